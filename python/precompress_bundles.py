@@ -0,0 +1,89 @@
+"""Precompress the JavaScript bundles of the package and give the main bundle a content hash
+
+Run after the JavaScript build, see the build script in package.json. The main bundle, loaded
+by a script tag, is renamed to include a hash of its content. The async chunks keep their
+names, as these are loaded by the webpack runtime. A gzip variant, and a brotli variant if the
+brotli module is installed, is written for each bundle, and the files are listed in
+bundle-manifest.json, which is read by the package when registering _js_dist.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+PACKAGE_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "webviz_subsurface_components"
+)
+MAIN_BUNDLE = "webviz_subsurface_components.min.js"
+MANIFEST_NAME = "bundle-manifest.json"
+
+
+def compressors():
+    encodings = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        # pylint: disable=import-outside-toplevel
+        import brotli
+    except ImportError:
+        print("brotli is not installed, only gzip variants are written")
+    else:
+        encodings["br"] = lambda data: brotli.compress(data, quality=11)
+    return encodings
+
+
+def remove_previous(directory):
+    """Remove files written by a previous run, as listed in the manifest"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf8") as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return
+    for name, entry in manifest.items():
+        for filename in entry["encodings"].values():
+            if os.path.exists(os.path.join(directory, filename)):
+                os.remove(os.path.join(directory, filename))
+        hashed = os.path.join(directory, entry["path"])
+        if entry["path"] != name and os.path.exists(hashed):
+            # Keep the hashed bundle as the bundle if it is not rebuilt since the previous run
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(hashed)
+            else:
+                os.replace(hashed, os.path.join(directory, name))
+
+
+def main(directory):
+    remove_previous(directory)
+    bundles = sorted(
+        filename
+        for filename in os.listdir(directory)
+        if filename == MAIN_BUNDLE or filename.startswith("async-")
+        if filename.endswith(".js")
+    )
+    if MAIN_BUNDLE not in bundles:
+        sys.exit(f"{MAIN_BUNDLE} not found in {directory}, run the JavaScript build")
+
+    encodings = compressors()
+    manifest = {}
+    for name in bundles:
+        with open(os.path.join(directory, name), "rb") as file:
+            data = file.read()
+        content_hash = hashlib.sha256(data).hexdigest()[:16]
+        path = name
+        if name == MAIN_BUNDLE:
+            path = name.replace(".min.js", f".{content_hash}.min.js")
+            os.replace(os.path.join(directory, name), os.path.join(directory, path))
+        manifest[name] = {"path": path, "hash": content_hash, "encodings": {}}
+        for encoding, compress in encodings.items():
+            filename = f"{path}.{'br' if encoding == 'br' else 'gz'}"
+            with open(os.path.join(directory, filename), "wb") as file:
+                file.write(compress(data))
+            manifest[name]["encodings"][encoding] = filename
+
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf8") as file:
+        json.dump(manifest, file, indent=4)
+    print(f"Precompressed {len(manifest)} bundles in {directory}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else PACKAGE_DIRECTORY)
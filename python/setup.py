@@ -24,6 +24,7 @@ TESTS_REQUIRE = [
     "orjson>=3.8.2",
     "Pillow>=6.0",
     "pylint>=2.4",
+    "pytest-benchmark>=4.0",
     "scipy>=1.2",
     "selenium>=3.141",
     "vtk>=9.2.2",
@@ -0,0 +1,332 @@
+"""Character scanning parser of py_expression_eval, as before the single-pass tokenizer
+
+Kept as reference for the tokens and error messages of Parser.parse(), and for benchmarking
+Parser.tokenize() against the scanner it replaced. The scanner is unchanged, except that the
+operators, functions and constants are taken from Parser.
+
+This is a modification of `py-expression-eval` created by AxiaCore, licensed under the MIT
+license, see webviz_subsurface_components/py_expression_eval.py.
+"""
+
+import re
+
+from webviz_subsurface_components.py_expression_eval import (
+    TFUNCALL,
+    TNUMBER,
+    TOP1,
+    TOP2,
+    TVAR,
+    Expression,
+    Parser,
+    ParserError,
+    Token,
+)
+
+
+# pylint: disable= too-many-instance-attributes
+class ScanningParser:
+    """Parser of the package before tokenize(), scanning one character at a time
+
+    The scan state is kept on the instance, thus an instance must not be shared between threads.
+    """
+
+    PRIMARY = 1
+    OPERATOR = 2
+    FUNCTION = 4
+    LPAREN = 8
+    RPAREN = 16
+    SIGN = 32
+    CALL = 64
+    NULLARY_CALL = 128
+
+    def __init__(self, string_literal_quotes=("'", '"')):
+        self.string_literal_quotes = string_literal_quotes
+
+        self.success = False
+        self.errormsg = ""
+        self.expression = ""
+
+        self.pos = 0
+
+        self.tokennumber = 0
+        self.tokenprio = 0
+        self.tokenindex = 0
+        self.tmpprio = 0
+
+        parser = Parser()
+        self.ops1 = parser.ops1
+        self.ops2 = parser.ops2
+        self.consts = parser.consts
+
+    # pylint: disable = too-many-branches, too-many-statements
+    def parse(self, expr):
+        self.errormsg = ""
+        self.success = True
+        operstack = []
+        tokenstack = []
+        self.tmpprio = 0
+        expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
+        noperators = 0
+        self.expression = expr
+        self.pos = 0
+
+        while self.pos < len(self.expression):
+            if self.is_operator():
+                if self.is_sign() and expected & self.SIGN:
+                    if self.is_negative_sign():
+                        self.tokenprio = 5
+                        self.tokenindex = "-"
+                        noperators += 1
+                        self.addfunc(tokenstack, operstack, TOP1)
+                    expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
+                else:
+                    if expected and self.OPERATOR == 0:
+                        self.error_parsing(self.pos, "unexpected operator")
+                    noperators += 2
+                    self.addfunc(tokenstack, operstack, TOP2)
+                    expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
+            elif self.is_number():
+                if expected and self.PRIMARY == 0:
+                    self.error_parsing(self.pos, "unexpected number")
+                token = Token(TNUMBER, 0, 0, self.tokennumber)
+                tokenstack.append(token)
+                expected = self.OPERATOR | self.RPAREN
+            elif self.is_left_parenth():
+                if (expected & self.LPAREN) == 0:
+                    self.error_parsing(self.pos, 'unexpected "("')
+                if expected & self.CALL:
+                    noperators += 2
+                    self.tokenprio = -2
+                    self.tokenindex = -1
+                    self.addfunc(tokenstack, operstack, TFUNCALL)
+                expected = (
+                    self.PRIMARY
+                    | self.LPAREN
+                    | self.FUNCTION
+                    | self.SIGN
+                    | self.NULLARY_CALL
+                )
+            elif self.is_right_parenth():
+                if expected & self.NULLARY_CALL:
+                    token = Token(TNUMBER, 0, 0, [])
+                    tokenstack.append(token)
+                elif (expected & self.RPAREN) == 0:
+                    self.error_parsing(self.pos, 'unexpected ")"')
+                expected = self.OPERATOR | self.RPAREN | self.LPAREN | self.CALL
+            elif self.is_const():
+                if (expected & self.PRIMARY) == 0:
+                    self.error_parsing(self.pos, "unexpected constant")
+                consttoken = Token(TNUMBER, 0, 0, self.tokennumber)
+                tokenstack.append(consttoken)
+                expected = self.OPERATOR | self.RPAREN
+            elif self.is_op2():
+                if (expected & self.FUNCTION) == 0:
+                    self.error_parsing(self.pos, "unexpected function")
+                self.addfunc(tokenstack, operstack, TOP2)
+                noperators += 2
+                expected = self.LPAREN
+            elif self.is_op1():
+                if (expected & self.FUNCTION) == 0:
+                    self.error_parsing(self.pos, "unexpected function")
+                self.addfunc(tokenstack, operstack, TOP1)
+                noperators += 1
+                expected = self.LPAREN
+            elif self.is_var():
+                if (expected & self.PRIMARY) == 0:
+                    self.error_parsing(self.pos, "unexpected variable")
+                vartoken = Token(TVAR, self.tokenindex, 0, 0)
+                tokenstack.append(vartoken)
+                expected = self.OPERATOR | self.RPAREN | self.CALL
+            elif self.is_white():
+                pass
+            else:
+                if self.errormsg == "":
+                    self.error_parsing(self.pos, "unknown character")
+                else:
+                    self.error_parsing(self.pos, self.errormsg)
+        if self.tmpprio < 0 or self.tmpprio >= 10:
+            self.error_parsing(self.pos, 'unmatched "()"')
+        while len(operstack) > 0:
+            tmp = operstack.pop()
+            tokenstack.append(tmp)
+        if (noperators + 1) != len(tokenstack):
+            self.error_parsing(self.pos, "parity")
+
+        return Expression(tokenstack, self.ops1, self.ops2)
+
+    def evaluate(self, expr, variables):
+        return self.parse(expr).evaluate(variables)
+
+    def error_parsing(self, column, msg):
+        self.success = False
+        self.errormsg = (
+            f"parse error [column {column}]: {msg}, expression: {self.expression}"
+        )
+        raise ParserError(self.errormsg)
+
+    def addfunc(self, tokenstack, operstack, type_):
+        operator = Token(
+            type_,
+            self.tokenindex,
+            self.tokenprio + self.tmpprio,
+            0,
+        )
+        while len(operstack) > 0:
+            if operator.prio_ <= operstack[len(operstack) - 1].prio_:
+                tokenstack.append(operstack.pop())
+            else:
+                break
+        operstack.append(operator)
+
+    def is_number(self):
+        res = False
+
+        if self.expression[self.pos] == "E":
+            return False
+
+        # number in scientific notation
+        pattern = r"([-+]?([0-9]*\.?[0-9]*)[eE][-+]?[0-9]+).*"
+        match = re.match(pattern, self.expression[self.pos :])
+        if match:
+            self.pos += len(match.group(1))
+            self.tokennumber = float(match.group(1))
+            return True
+
+        # number in decimal
+        _str = ""
+        while self.pos < len(self.expression):
+            code = self.expression[self.pos]
+            if "0" <= code <= "9" or code == ".":
+                if len(_str) == 0 and code == ".":
+                    _str = "0"
+                _str += code
+                self.pos += 1
+                try:
+                    self.tokennumber = int(_str)
+                except ValueError:
+                    self.tokennumber = float(_str)
+                res = True
+            else:
+                break
+        return res
+
+    def is_const(self):
+        for constant_name, constant_value in self.consts.items():
+            _len = len(constant_name)
+            _str = self.expression[self.pos : self.pos + _len]
+            if constant_name == _str:
+                if len(self.expression) <= self.pos + _len:
+                    self.tokennumber = constant_value
+                    self.pos += _len
+                    return True
+                if (
+                    not self.expression[self.pos + _len].isalnum()
+                    and self.expression[self.pos + _len] != "_"
+                ):
+                    self.tokennumber = constant_value
+                    self.pos += _len
+                    return True
+        return False
+
+    def is_operator(self):
+        ops = (
+            ("**", 8, "**"),
+            ("^", 8, "^"),
+            ("%", 6, "%"),
+            ("/", 6, "/"),
+            ("\u2219", 5, "*"),  # bullet operator
+            ("\u2022", 5, "*"),  # black small circle
+            ("*", 5, "*"),
+            ("+", 4, "+"),
+            ("-", 4, "-"),
+        )
+        for token, priority, index in ops:
+            if self.expression.startswith(token, self.pos):
+                self.tokenprio = priority
+                self.tokenindex = index
+                self.pos += len(token)
+                return True
+        return False
+
+    def is_sign(self):
+        code = self.expression[self.pos - 1]
+        return code in ("+", "-")
+
+    def is_positive_sign(self):
+        code = self.expression[self.pos - 1]
+        return code == "+"
+
+    def is_negative_sign(self):
+        code = self.expression[self.pos - 1]
+        return code == "-"
+
+    def is_left_parenth(self):
+        code = self.expression[self.pos]
+        if code == "(":
+            self.pos += 1
+            self.tmpprio += 10
+            return True
+        return False
+
+    def is_right_parenth(self):
+        code = self.expression[self.pos]
+        if code == ")":
+            self.pos += 1
+            self.tmpprio -= 10
+            return True
+        return False
+
+    def is_white(self):
+        code = self.expression[self.pos]
+        if code.isspace():
+            self.pos += 1
+            return True
+        return False
+
+    def is_op1(self):
+        _str = ""
+        for i in range(self.pos, len(self.expression)):
+            char = self.expression[i]
+            if char.upper() == char.lower():
+                if i == self.pos or (char != "_" and (char < "0" or char > "9")):
+                    break
+            _str += char
+        if len(_str) > 0 and _str in self.ops1:
+            self.tokenindex = _str
+            self.tokenprio = 9
+            self.pos += len(_str)
+            return True
+        return False
+
+    def is_op2(self):
+        _str = ""
+        for i in range(self.pos, len(self.expression)):
+            char = self.expression[i]
+            if char.upper() == char.lower():
+                if i == self.pos or (char != "_" and (char < "0" or char > "9")):
+                    break
+            _str += char
+        if len(_str) > 0 and (_str in self.ops2):
+            self.tokenindex = _str
+            self.tokenprio = 9
+            self.pos += len(_str)
+            return True
+        return False
+
+    def is_var(self):
+        _str = ""
+        for i in range(self.pos, len(self.expression)):
+            char = self.expression[i]
+            if (
+                char.lower() == char.upper()
+                and not (char in "_.")
+                and (char < "0" or char > "9")
+            ):
+                break
+            _str += char
+        if _str:
+            self.tokenindex = _str
+            self.tokenprio = 6
+            self.pos += len(_str)
+            return True
+        return False
@@ -0,0 +1,162 @@
+"""Synthetic ensemble data for the tests and benchmarks
+
+Vectors are arrays of shape (realizations, timesteps), with rates declining from a random
+plateau and cumulatives integrating the rates, such that expressions see realistic value ranges
+including zero rates of shut-in wells. All generators take a seed and are deterministic.
+"""
+
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+TIMESTEPS = 1000
+
+# Array sizes for throughput benchmarks, extended by setting WEBVIZ_BENCHMARK_MAX_SIZE,
+# e.g. to 1000000000 on a machine with enough memory
+ARRAY_SIZES = [
+    size
+    for size in (10**4, 10**5, 10**6, 10**7, 10**8, 10**9)
+    if size <= int(float(os.environ.get("WEBVIZ_BENCHMARK_MAX_SIZE", 10**6)))
+]
+
+VECTOR_NAMES = [
+    "WOPR:A-1",
+    "WOPT:A-1",
+    "WWPR:A-2",
+    "WWPT:A-2",
+    "WGPR:A-3",
+    "FOPT",
+    "FWPT",
+    "GOPR:OP",
+    "ROIP:3",
+    "BPR:10,12,3",
+]
+
+INVALID_EXPRESSIONS = ["a+", "(a+b", "a$b", "a b", "sqrt", "2..5*a", "a)*(b", ""]
+
+# Mnemonics of summary vector names by kind, see summary_vector_names()
+_WELL_MNEMONICS = ["WOPR", "WWPR", "WGPR", "WOPT", "WWCT", "WBHP"]
+_COMPLETION_MNEMONICS = ["WOPRL", "WWPRL", "WGPRL", "WOPTL"]
+_OTHER_MNEMONICS = [
+    "FOPT",
+    "FWPT",
+    "GOPR",
+    "ROIP",
+    "ROIP_REG",
+    "RPR__NUM",
+    "BPR",
+    "WO2PR",
+]
+
+_FUNCTIONS = ["sqrt", "abs", "ln", "log10"]
+_OPERATORS = ["+", "-", "*", "/", "^"]
+
+
+def ensemble_values(
+    names: Sequence[str],
+    size: int,
+    dtype: np.dtype = np.float64,
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """Get vector per name with size elements, as realizations of TIMESTEPS values
+
+    Names with a mnemonic ending with "T", e.g. WOPT:A-1, are cumulatives, others are rates.
+    """
+    rng = np.random.default_rng(seed)
+    timesteps = min(size, TIMESTEPS)
+    shape = (size // timesteps, timesteps)
+    decline = np.exp(-np.linspace(0.0, 3.0, timesteps))
+    values = {}
+    for name in names:
+        plateau = rng.uniform(100.0, 5000.0, size=(shape[0], 1))
+        rate = plateau * decline * rng.uniform(0.9, 1.1, size=shape)
+        rate[rng.random(shape[0]) < 0.1] = 0.0  # Shut-in realizations
+        if name.split(":", 1)[0].endswith("T"):
+            rate = np.cumsum(rate, axis=1)
+        values[name] = rate.astype(dtype)
+    return values
+
+
+def random_expression(length: int, variables: Sequence[str], seed: int = 0) -> str:
+    """Get valid expression of at least length characters with variables, numbers and functions"""
+    rng = np.random.default_rng(seed)
+
+    def operand() -> str:
+        choice = rng.random()
+        if choice < 0.6:
+            return str(rng.choice(variables))
+        if choice < 0.8:
+            return str(round(float(rng.uniform(0.5, 10.0)), 2))
+        return f"{rng.choice(_FUNCTIONS)}({rng.choice(variables)})"
+
+    parts = [operand()]
+    while sum(len(part) for part in parts) < length:
+        term = f"{rng.choice(_OPERATORS[:4])} {operand()}"
+        if rng.random() < 0.2:
+            term = (
+                f"{rng.choice(_OPERATORS[:4])} ({operand()} {rng.choice(_OPERATORS)} 2)"
+            )
+        parts.append(term)
+    return " ".join(parts)
+
+
+def expression_infos(
+    count: int, invalid_fraction: float = 0.2, seed: int = 0
+) -> List[dict]:
+    """Get ExpressionInfo dicts as stored by a dashboard, a fraction of them invalid
+
+    Expression strings repeat, as dashboards often store equal expressions under several names.
+    """
+    rng = np.random.default_rng(seed)
+    variables = ["a", "b", "c", "x", "y"]
+    infos = []
+    for i in range(count):
+        if rng.random() < invalid_fraction:
+            expression = str(rng.choice(INVALID_EXPRESSIONS))
+        else:
+            # Equal seeds give equal expressions
+            expression_seed = int(rng.integers(max(count // 4, 1)))
+            expression = random_expression(
+                10 + expression_seed % 70, variables, seed=expression_seed
+            )
+        infos.append(
+            {
+                "name": f"expression_{i}",
+                "expression": expression,
+                "id": f"id_{i}",
+                "variableVectorMap": [
+                    {"variableName": variable, "vectorName": [str(vector)]}
+                    for variable, vector in zip(
+                        variables, rng.choice(VECTOR_NAMES, len(variables))
+                    )
+                ],
+                "isValid": True,
+                "isDeletable": True,
+            }
+        )
+    return infos
+
+
+def summary_vector_names(count: int, seed: int = 0) -> List[str]:
+    """Get summary vector names of wells, completions, groups, regions and blocks
+
+    Completion mnemonics are padded with "_" to eight characters of mnemonic and completion
+    number, e.g. WOPRL__1, WOPRL_10 and WOPRL123. Names repeat, as in an ensemble of cases.
+    """
+    rng = np.random.default_rng(seed)
+    names = []
+    for _ in range(count):
+        kind = rng.random()
+        well = f"OP_{rng.integers(1, 50)}"
+        if kind < 0.4:
+            names.append(f"{rng.choice(_WELL_MNEMONICS)}:{well}")
+        elif kind < 0.8:
+            mnemonic = str(rng.choice(_COMPLETION_MNEMONICS))
+            number = str(rng.integers(1, 1000))
+            names.append(f"{mnemonic}{number.rjust(8 - len(mnemonic), '_')}:{well}")
+        elif kind < 0.99:
+            names.append(f"{rng.choice(_OTHER_MNEMONICS)}:{rng.integers(1, 20)}")
+        else:
+            names.append(f"NOTAVECTOR:{well}")
+    return names
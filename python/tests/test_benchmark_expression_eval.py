@@ -0,0 +1,96 @@
+"""Benchmarks of parsing and evaluation in py_expression_eval
+
+Run with pytest, results are written as JSON by pytest-benchmark, e.g.
+pytest tests --benchmark-json=benchmark.json, or saved with --benchmark-autosave and compared
+between commits with --benchmark-compare.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_ensemble import ARRAY_SIZES, ensemble_values, random_expression
+
+from webviz_subsurface_components.py_expression_eval import Parser
+
+VARIABLES = ["WOPR:A-1", "WWPR:A-2", "WGPR:A-3", "WOPT:A-1"]
+EXPRESSION = "(a + b) / (a + b + c) * sqrt(d) - 0.5 * ln(a + 1)"
+
+
+@pytest.mark.parametrize("length", [10, 100, 500, 2000])
+def test_parse_latency(benchmark, length):
+    parser = Parser()
+    expression = random_expression(length, ["a", "b", "c", "WOPR", "WWPR"])
+    benchmark.extra_info["length"] = len(expression)
+
+    parsed = benchmark(parser.parse, expression)
+
+    assert set(parsed.variables()) <= {"a", "b", "c", "WOPR", "WWPR"}
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64], ids=["float32", "float64"])
+@pytest.mark.parametrize("size", ARRAY_SIZES)
+def test_evaluate_throughput(benchmark, size, dtype):
+    expression = Parser().parse(EXPRESSION)
+    vectors = ensemble_values(VARIABLES, size, dtype)
+    values = dict(zip(["a", "b", "c", "d"], vectors.values()))
+    benchmark.extra_info["size"] = size
+    benchmark.extra_info["dtype"] = np.dtype(dtype).name
+
+    with np.errstate(all="ignore"):
+        result = benchmark(expression.evaluate, values)
+
+    assert result.shape == values["a"].shape
+
+
+@pytest.mark.parametrize("method", ["evaluate", "chunked", "chunked_threads"])
+@pytest.mark.parametrize("size", ARRAY_SIZES)
+def test_evaluate_chunked_speedup(benchmark, size, method):
+    expression = Parser().parse(EXPRESSION)
+    vectors = ensemble_values(VARIABLES, size)
+    values = dict(zip(["a", "b", "c", "d"], vectors.values()))
+    evaluate = {
+        "evaluate": expression.evaluate,
+        "chunked": expression.evaluate_chunked,
+        "chunked_threads": lambda values: expression.evaluate_chunked(
+            values, max_workers=os.cpu_count()
+        ),
+    }[method]
+    benchmark.group = f"chunked evaluation of {size} elements"
+    benchmark.extra_info["size"] = size
+
+    with np.errstate(all="ignore"):
+        result = benchmark(evaluate, values)
+        expected = expression.evaluate(values)
+
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64], ids=["float32", "float64"])
+@pytest.mark.parametrize("method", ["evaluate", "evaluate_jit"])
+@pytest.mark.parametrize("size", ARRAY_SIZES)
+def test_evaluate_jit_speedup(benchmark, size, method, dtype):
+    pytest.importorskip("numba")
+    expression = Parser().parse(EXPRESSION)
+    vectors = ensemble_values(VARIABLES, size, dtype)
+    values = dict(zip(["a", "b", "c", "d"], vectors.values()))
+    # min_size=0 to compare the kernel to numpy also below JIT_MIN_SIZE
+    evaluate = {
+        "evaluate": expression.evaluate,
+        "evaluate_jit": lambda values: expression.evaluate_jit(values, min_size=0),
+    }[method]
+    benchmark.group = f"jit evaluation of {size} {np.dtype(dtype).name} elements"
+    benchmark.extra_info["size"] = size
+    benchmark.extra_info["dtype"] = np.dtype(dtype).name
+
+    with np.errstate(all="ignore"):
+        # Compile the kernel before timing
+        evaluate(values)
+        result = benchmark(evaluate, values)
+        expected = expression.evaluate(values)
+
+    assert result.dtype == expected.dtype
+    np.testing.assert_allclose(
+        result, expected, rtol=1e-5 if dtype == np.float32 else 1e-12
+    )
@@ -0,0 +1,88 @@
+"""Benchmarks of the batch methods of VectorCalculatorWrapper
+
+Each batch is benchmarked with empty caches, as when a dashboard loads its stored expressions,
+and with the caches filled by an earlier call.
+"""
+
+import pytest
+
+from synthetic_ensemble import expression_infos
+
+from webviz_subsurface_components.VectorCalculatorWrapper import (
+    VectorCalculatorWrapper,
+)
+
+BATCH_SIZES = [10, 100, 1000]
+
+
+def clear_caches():
+    VectorCalculatorWrapper.expression_cache.clear()
+    # pylint: disable=no-member, protected-access
+    VectorCalculatorWrapper._detailed_expression.cache_clear()
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "cached"])
+@pytest.mark.parametrize("count", BATCH_SIZES)
+def test_external_parse_data_batch(benchmark, count, cached):
+    expressions = expression_infos(count)
+    benchmark.extra_info["count"] = count
+
+    def parse_batch():
+        return [
+            VectorCalculatorWrapper.external_parse_data(expression)
+            for expression in expressions
+        ]
+
+    clear_caches()
+    if cached:
+        parse_data = benchmark(parse_batch)
+    else:
+        parse_data = benchmark.pedantic(parse_batch, setup=clear_caches, rounds=20)
+
+    assert [data["id"] for data in parse_data] == [info["id"] for info in expressions]
+    assert any(data["isValid"] for data in parse_data)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "cached"])
+@pytest.mark.parametrize("count", BATCH_SIZES)
+def test_detailed_expression_batch(benchmark, count, cached):
+    expressions = expression_infos(count)
+    benchmark.extra_info["count"] = count
+
+    clear_caches()
+    if cached:
+        detailed = benchmark(VectorCalculatorWrapper.detailed_expressions, expressions)
+    else:
+        detailed = benchmark.pedantic(
+            VectorCalculatorWrapper.detailed_expressions,
+            args=(expressions,),
+            setup=clear_caches,
+            rounds=20,
+        )
+
+    assert len(detailed) == count
+
+
+@pytest.mark.parametrize("method", ["external_parse_data", "validate_expressions"])
+def test_validate_expressions(benchmark, method):
+    # A dashboard with 1000 stored expressions, a fifth of them invalid
+    expressions = expression_infos(1000, invalid_fraction=0.2)
+    validate = {
+        "external_parse_data": lambda expressions: [
+            VectorCalculatorWrapper.external_parse_data(expression)
+            for expression in expressions
+        ],
+        "validate_expressions": VectorCalculatorWrapper.validate_expressions,
+    }[method]
+    benchmark.group = "validate 1000 expressions"
+
+    parse_data = benchmark.pedantic(
+        validate, args=(expressions,), setup=clear_caches, rounds=20
+    )
+
+    clear_caches()
+    assert parse_data == [
+        VectorCalculatorWrapper.external_parse_data(expression)
+        for expression in expressions
+    ]
+    assert 0 < sum(not data["isValid"] for data in parse_data) < len(parse_data)
@@ -0,0 +1,62 @@
+"""Tests of ConstantArray and SparseArray variable values"""
+
+import numpy as np
+import pytest
+
+from webviz_subsurface_components.compact_arrays import ConstantArray, SparseArray
+from webviz_subsurface_components.py_expression_eval import (
+    DEFAULT_CHUNK_SIZE,
+    Parser,
+)
+
+# More than two chunks, not a multiple of the chunk size
+SIZE = 3 * DEFAULT_CHUNK_SIZE + 1000
+
+COMPACT_VALUES = {
+    "constant": ConstantArray(2.0, (SIZE,)),
+    "sparse": SparseArray.from_dense(
+        np.where(np.arange(SIZE) % 997 == 0, np.arange(SIZE) * 0.5, 0.0)
+    ),
+    "sparse_last_chunk": SparseArray([SIZE - 1], [5.0], (SIZE,), value=1.0),
+}
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+@pytest.mark.parametrize("name", COMPACT_VALUES)
+def test_evaluate_chunked(name, max_workers):
+    expression = Parser().parse("a * c + c / (a + 1)")
+    values = {"a": np.linspace(0.0, 1.0, SIZE), "c": COMPACT_VALUES[name]}
+
+    result = expression.evaluate_chunked(values, max_workers=max_workers)
+
+    assert isinstance(result, np.ndarray)
+    np.testing.assert_array_equal(result, expression.evaluate(values))
+
+
+def test_evaluate_chunked_2d():
+    expression = Parser().parse("a - c")
+    values = {
+        "a": np.ones((4, SIZE // 4)),
+        "c": SparseArray([3, SIZE - 5], [7.0, 9.0], (4, SIZE // 4)),
+    }
+
+    result = expression.evaluate_chunked(values)
+
+    np.testing.assert_array_equal(result, expression.evaluate(values))
+
+
+@pytest.mark.parametrize("name", COMPACT_VALUES)
+def test_evaluate_stream(name):
+    expression = Parser().parse("a * c")
+    chunks = np.array_split(np.linspace(0.0, 1.0, SIZE), 3)
+    compact = COMPACT_VALUES[name]
+    compact = (
+        ConstantArray(compact.value, chunks[0].shape)
+        if isinstance(compact, ConstantArray)
+        else SparseArray([0, 5], [3.0, 4.0], chunks[0].shape)
+    )
+
+    results = list(expression.evaluate_stream({"a": chunks[:1], "c": compact}))
+
+    assert len(results) == 1
+    np.testing.assert_array_equal(results[0], chunks[0] * np.asarray(compact))
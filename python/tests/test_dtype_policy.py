@@ -0,0 +1,95 @@
+"""Tests of the dtype policies for numbers in parsed expressions"""
+
+import numpy as np
+import pytest
+
+from synthetic_ensemble import ensemble_values
+
+from webviz_subsurface_components.py_expression_eval import DTYPE_POLICIES, Parser
+
+VARIABLES = ["WOPR:A-1", "WWPR:A-2", "WGPR:A-3", "WOPT:A-1"]
+EXPRESSIONS = [
+    "a + b",
+    "(a + b) / (a + b + c)",
+    "a * 0.1 + PI * b - E",
+    "sqrt(d) - 0.5 * ln(a + 1)",
+    "log10(d + 1) * 1.05",
+    "abs(-a) / 7.5",
+]
+
+# Relative tolerance of results in each dtype to a float64 reference
+RTOL = {np.dtype(np.float32): 1e-5, np.dtype(np.float64): 1e-12}
+
+# Result dtype per policy and dtype of the values
+RESULT_DTYPES = {
+    (None, np.float32): np.float32,
+    (None, np.float64): np.float64,
+    ("preserve", np.float32): np.float32,
+    ("preserve", np.float64): np.float64,
+    ("float32", np.float32): np.float32,
+    ("float32", np.float64): np.float32,
+    ("float64", np.float32): np.float64,
+    ("float64", np.float64): np.float64,
+}
+
+
+def variable_values(dtype):
+    vectors = ensemble_values(VARIABLES, 10**5, dtype)
+    return dict(zip(["a", "b", "c", "d"], vectors.values()))
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+@pytest.mark.parametrize("dtype", [np.float32, np.float64], ids=["float32", "float64"])
+@pytest.mark.parametrize("policy", DTYPE_POLICIES)
+def test_results_within_tolerance(policy, dtype, expression):
+    values = variable_values(dtype)
+    reference_values = {
+        name: value.astype(np.float64) for name, value in values.items()
+    }
+    parsed = Parser(dtype=policy).parse(expression)
+
+    with np.errstate(all="ignore"):
+        reference = Parser().parse(expression).evaluate(reference_values)
+        result = parsed.evaluate(values)
+        compiled = parsed.compile()(values)
+
+    result_dtype = np.dtype(RESULT_DTYPES[(policy, dtype)])
+    assert result.dtype == result_dtype
+    assert compiled.dtype == result_dtype
+    np.testing.assert_array_equal(compiled, result)
+    # Rounding of values given as float32 is included in the reference
+    np.testing.assert_allclose(
+        result, reference, rtol=RTOL[result_dtype], atol=1e-6, equal_nan=True
+    )
+
+
+@pytest.mark.parametrize("policy", ["preserve", "float32"])
+def test_float32_numbers_do_not_upcast(policy):
+    values = {"a": np.ones(10, dtype=np.float32)}
+    parsed = Parser(dtype=policy).parse("a * 1.05 ^ 2 + PI")
+
+    assert parsed.evaluate(values).dtype == np.float32
+    assert parsed.evaluate({"a": np.float32(1.0)}).dtype == np.float32
+
+
+def test_preserve_keeps_integer_values():
+    values = {"a": np.arange(10, dtype=np.int32)}
+
+    result = Parser(dtype="preserve").parse("a * 2 + 1").evaluate(values)
+
+    assert result.dtype == np.int32
+    np.testing.assert_array_equal(result, values["a"] * 2 + 1)
+
+
+def test_with_dtype():
+    parsed = Parser().parse("a * 0.1")
+    values = {"a": np.ones(10, dtype=np.float64)}
+
+    assert parsed.with_dtype(None) is parsed
+    assert parsed.with_dtype("float32").evaluate(values).dtype == np.float32
+    assert parsed.evaluate(values).dtype == np.float64
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError, match="dtype must be one of"):
+        Parser(dtype="float16")
@@ -0,0 +1,52 @@
+"""Tests of evaluating expressions with the columns of frames"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from webviz_subsurface_components.VectorCalculatorWrapper import (
+    VectorCalculatorWrapper,
+)
+
+VARIABLE_VECTOR_MAP = [{"variableName": "a", "vectorName": ["WOPT:A1"]}]
+
+
+def test_evaluate_data_frame():
+    frame = pd.DataFrame({"WOPT:A1": pd.array([1, None, 3], dtype="Int64")})
+
+    result = VectorCalculatorWrapper.evaluate_frame("a + 1", frame, VARIABLE_VECTOR_MAP)
+
+    np.testing.assert_array_equal(result["a + 1"], [2.0, np.nan, 4.0])
+
+
+@pytest.mark.parametrize("nullable", [True, False])
+def test_evaluate_table_with_nulls_in_some_batches(nullable):
+    pa = pytest.importorskip("pyarrow")
+    schema = pa.schema([pa.field("WOPT:A1", pa.int64(), nullable=nullable)])
+    columns = [[1, 2], [3, None, 5], [6]] if nullable else [[1, 2], [3, 4, 5], [6]]
+    table = pa.Table.from_batches(
+        [pa.record_batch([pa.array(column)], schema=schema) for column in columns]
+    )
+
+    result = VectorCalculatorWrapper.evaluate_frame("a + 1", table, VARIABLE_VECTOR_MAP)
+
+    column = result.column("a + 1")
+    assert column.num_chunks == 3
+    if nullable:
+        assert column.type == pa.float64()
+        np.testing.assert_array_equal(
+            column.to_numpy(), [2.0, 3.0, 4.0, np.nan, 6.0, 7.0]
+        )
+    else:
+        assert column.type == pa.int64()
+        np.testing.assert_array_equal(column.to_numpy(), [2, 3, 4, 5, 6, 7])
+
+
+def test_evaluate_empty_table():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"WOPT:A1": pa.array([], type=pa.float64())})
+
+    result = VectorCalculatorWrapper.evaluate_frame("a * 2", table, VARIABLE_VECTOR_MAP)
+
+    assert result.column("a * 2").type == pa.float64()
+    assert len(result) == 0
@@ -0,0 +1,55 @@
+"""Tests of fused expression evaluation with numba"""
+
+import numpy as np
+import pytest
+
+from webviz_subsurface_components import expression_jit
+from webviz_subsurface_components.compact_arrays import ConstantArray, SparseArray
+from webviz_subsurface_components.py_expression_eval import Parser, ParserError
+
+pytest.importorskip("numba")
+
+
+@pytest.fixture(name="values")
+def fixture_values():
+    rng = np.random.default_rng(0)
+    return {"a": rng.uniform(1.0, 2.0, 1000), "b": rng.uniform(1.0, 2.0, 1000)}
+
+
+def no_kernel(*_):
+    raise AssertionError("kernel compiled")
+
+
+def test_equal_to_evaluate(values):
+    expression = Parser().parse("sqrt(a) * 2 + b / a - 1")
+
+    result = expression.evaluate_jit(values, min_size=0)
+
+    assert result.dtype == np.float64
+    np.testing.assert_allclose(result, expression.evaluate(values), rtol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "compact",
+    [ConstantArray(2.0, (1000,)), SparseArray([1, 5], [1.0, 3.0], (1000,))],
+    ids=["constant", "sparse"],
+)
+def test_compact_values_use_numpy(monkeypatch, values, compact):
+    monkeypatch.setattr(expression_jit, "_kernel", no_kernel)
+    expression = Parser().parse("a * c + b")
+    values = {**values, "c": compact}
+
+    result = expression.evaluate_jit(values, min_size=0)
+
+    np.testing.assert_array_equal(result, expression.evaluate(values))
+
+
+def test_unsupported_expression_is_cached(monkeypatch, values):
+    expression = Parser().parse("(a + b)(a)")
+
+    # Function calls can not be compiled, evaluate() raises for calling an array
+    with pytest.raises(ParserError, match="is not a function"):
+        expression.evaluate_jit(values, min_size=0)
+    monkeypatch.setattr(expression_jit, "_kernel", no_kernel)
+    with pytest.raises(ParserError, match="is not a function"):
+        expression.evaluate_jit(values, min_size=0)
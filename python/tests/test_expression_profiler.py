@@ -0,0 +1,40 @@
+"""Tests of per token profiling of expression evaluation"""
+
+import json
+
+import numpy as np
+
+from webviz_subsurface_components.expression_profiler import ExpressionProfiler
+from webviz_subsurface_components.py_expression_eval import Parser
+
+
+def test_evaluate_profiled():
+    expression = Parser().parse("sqrt(a) / b")
+    values = {"a": np.arange(4.0), "b": np.array([0.0, 1.0, 2.0, 4.0])}
+    profiler = ExpressionProfiler(count_nans=True)
+
+    with np.errstate(all="ignore"):
+        for _ in range(3):
+            result = expression.evaluate_profiled(values, profiler)
+        expected = expression.evaluate(values)
+
+    np.testing.assert_array_equal(result, expected)
+    report = {entry["operation"]: entry for entry in profiler.report()}
+    assert set(report) == {"variable a", "unary sqrt", "variable b", "binary /"}
+    assert all(entry["calls"] == 3 for entry in report.values())
+    assert report["variable a"]["bytes"] == 0
+    assert report["binary /"]["bytes"] == 3 * expected.nbytes
+    assert report["binary /"]["nans"] == 3
+    assert report["binary /"]["shape"] == [4]
+    assert json.loads(profiler.to_json()) == profiler.report()
+
+    profiler.reset()
+    assert not profiler.report()
+
+
+def test_nans_not_counted_by_default():
+    profiler = ExpressionProfiler()
+
+    Parser().parse("a + 1").evaluate_profiled({"a": np.ones(3)}, profiler)
+
+    assert all("nans" not in entry for entry in profiler.report())
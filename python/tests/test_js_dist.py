@@ -0,0 +1,101 @@
+"""Tests that the bundles registered in _js_dist exist in the package, also precompressed"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import webviz_subsurface_components
+
+PACKAGE_DIRECTORY = pathlib.Path(webviz_subsurface_components.__file__).parent
+PRECOMPRESS_BUNDLES = pathlib.Path(__file__).parents[1] / "precompress_bundles.py"
+
+ENVIRONMENTS = [
+    {},
+    {
+        "WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS": "GroupTree, SubsurfaceViewer",
+        "WEBVIZ_SUBSURFACE_COMPONENTS_SOURCE_MAPS": "0",
+    },
+]
+
+
+def import_package(package_parent, environment):
+    """Import the package in package_parent by a new interpreter, printing _js_dist as JSON"""
+    return subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import json\n"
+            "import webviz_subsurface_components as wsc\n"
+            "print(json.dumps(wsc._js_dist))\n",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=package_parent,
+        env={**os.environ, "PYTHONPATH": str(package_parent), **environment},
+    )
+
+
+def assert_bundles_exist(directory, js_dist):
+    assert js_dist
+    for entry in js_dist:
+        assert (directory / entry["relative_package_path"]).is_file(), entry
+
+
+def test_js_dist_paths_exist():
+    # pylint: disable=protected-access
+    assert_bundles_exist(PACKAGE_DIRECTORY, webviz_subsurface_components._js_dist)
+    assert_bundles_exist(
+        PACKAGE_DIRECTORY, webviz_subsurface_components._build_js_dist(None, True)
+    )
+
+
+@pytest.mark.parametrize("environment", ENVIRONMENTS, ids=["all", "selected"])
+def test_precompressed_js_dist_paths_exist(tmp_path, environment):
+    directory = tmp_path / "webviz_subsurface_components"
+    shutil.copytree(
+        PACKAGE_DIRECTORY, directory, ignore=shutil.ignore_patterns("__pycache__")
+    )
+    subprocess.run(
+        [sys.executable, str(PRECOMPRESS_BUNDLES), str(directory)],
+        check=True,
+        capture_output=True,
+    )
+    manifest = json.loads((directory / "bundle-manifest.json").read_text())
+
+    js_dist = json.loads(import_package(tmp_path, environment).stdout)
+
+    assert_bundles_exist(directory, js_dist)
+    main_entry = manifest["webviz_subsurface_components.min.js"]
+    assert js_dist[0]["relative_package_path"] == main_entry["path"]
+    assert main_entry["path"] == (
+        f"webviz_subsurface_components.{main_entry['hash']}.min.js"
+    )
+    content = (directory / main_entry["path"]).read_bytes()
+    assert hashlib.sha256(content).hexdigest()[:16] == main_entry["hash"]
+    for entry in manifest.values():
+        for filename in entry["encodings"].values():
+            assert (directory / filename).is_file()
+
+
+def test_unknown_component_in_environment():
+    # A typo in the environment variable must not fail the import of the package
+    result = import_package(
+        PACKAGE_DIRECTORY.parent,
+        {"WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS": "SubsurfaceViewr"},
+    )
+
+    assert "Unknown components ['SubsurfaceViewr']" in result.stderr
+    # pylint: disable=protected-access
+    assert json.loads(result.stdout) == webviz_subsurface_components._build_js_dist()
+
+
+def test_unknown_component_registered():
+    with pytest.raises(ValueError, match="Unknown components"):
+        webviz_subsurface_components.register_async_chunks(["SubsurfaceViewr"])
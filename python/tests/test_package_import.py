@@ -0,0 +1,71 @@
+"""Tests of importing the package, which imports components and helpers on first access"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Modules imported on first access of package attributes
+LAZY_MODULES = [
+    "dash",
+    "numpy",
+    "webviz_subsurface_components.py_expression_eval",
+    "webviz_subsurface_components.VectorCalculatorWrapper",
+    "webviz_subsurface_components.VectorDefinitions",
+]
+
+
+def run_python(*args):
+    """Run Python in a new interpreter, such that no module is imported in advance"""
+    return subprocess.run(
+        [sys.executable, *args], check=True, capture_output=True, text=True
+    )
+
+
+def test_import_time():
+    # Lines of -X importtime are "import time: self [us] | cumulative | imported package"
+    stderr = run_python(
+        "-X", "importtime", "-c", "import webviz_subsurface_components"
+    ).stderr
+    imported = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+    assert "webviz_subsurface_components" in imported
+    assert imported.isdisjoint(LAZY_MODULES)
+
+
+@pytest.mark.parametrize(
+    "name, module",
+    [
+        ("py_expression_eval", "py_expression_eval"),
+        ("VectorCalculatorWrapper", "VectorCalculatorWrapper"),
+        ("Parser", "py_expression_eval"),
+        ("VectorCalculator", "VectorCalculatorWrapper"),
+        ("VectorDefinitionResolver", "VectorDefinitions"),
+    ],
+)
+def test_attribute_access(name, module):
+    stdout = run_python(
+        "-c",
+        "import webviz_subsurface_components as wsc\n"
+        f"value = wsc.{name}\n"
+        "print(getattr(value, '__module__', None) or value.__name__)\n"
+        f"print(wsc.{name} is value)\n",
+    ).stdout
+
+    assert stdout.split() == [f"webviz_subsurface_components.{module}", "True"]
+
+
+def test_submodule_attributes_after_import():
+    stdout = run_python(
+        "-c",
+        "import webviz_subsurface_components.py_expression_eval\n"
+        "import webviz_subsurface_components as wsc\n"
+        "print(wsc.py_expression_eval.Parser is wsc.Parser)\n"
+        "print(type(wsc.VectorDefinitions).__name__)\n",
+    ).stdout
+
+    assert stdout.split() == ["True", "dict"]
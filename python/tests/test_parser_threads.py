@@ -0,0 +1,79 @@
+"""Stress tests of a Parser shared between threads"""
+
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from synthetic_ensemble import INVALID_EXPRESSIONS, ensemble_values, random_expression
+
+from webviz_subsurface_components.py_expression_eval import Parser, ParserError
+from webviz_subsurface_components.VectorCalculatorWrapper import (
+    VectorCalculatorWrapper,
+)
+
+THREADS = 16
+ROUNDS = 10
+
+
+def parse_result(parser, expression):
+    """Get comparable result of parsing expression, the tokens or the error message"""
+    try:
+        parsed = parser.parse(expression)
+    except ParserError as e:
+        return str(e)
+    return [(item.type_, item.index_, item.number_) for item in parsed.tokens]
+
+
+@pytest.fixture(name="fast_switching")
+def fixture_fast_switching():
+    """Switch threads often, to interleave the threads within parse()"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+# pylint: disable=unused-argument
+def test_shared_parser(fast_switching):
+    parser = Parser()
+    expressions = [
+        random_expression(length, ["a", "b", "WOPR", "x_1"], seed=length)
+        for length in range(5, 400, 7)
+    ] + INVALID_EXPRESSIONS
+    expected = [parse_result(Parser(), expression) for expression in expressions]
+
+    barrier = threading.Barrier(THREADS)
+    failures = []
+
+    def hammer(thread):
+        barrier.wait()
+        for i in range(ROUNDS):
+            # Threads start at different expressions, such that they parse different strings
+            offset = (thread + i) % len(expressions)
+            for j in list(range(offset, len(expressions))) + list(range(offset)):
+                result = parse_result(parser, expressions[j])
+                if result != expected[j]:
+                    failures.append((thread, expressions[j], result))
+
+    threads = [threading.Thread(target=hammer, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not failures
+
+
+def test_evaluate_expressions_thread_pool():
+    vectors = list(ensemble_values(["WOPR:A-1", "WWPR:A-1"], 10**5).values())
+    pairs = [
+        (f"a * {i} + b", {"a": vectors[0], "b": vectors[1]}) for i in range(200)
+    ] + [("a +", {"a": vectors[0]})]
+
+    results = VectorCalculatorWrapper.evaluate_expressions(pairs, max_workers=THREADS)
+
+    assert results[-1] is None
+    for i, result in enumerate(results[:-1]):
+        np.testing.assert_array_equal(result, vectors[0] * i + vectors[1])
@@ -0,0 +1,77 @@
+"""Tests of batch evaluation with common subexpression elimination"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from synthetic_ensemble import ensemble_values, random_expression
+
+from webviz_subsurface_components.py_expression_eval import Parser, ParserError
+from webviz_subsurface_components.shared_subexpressions import (
+    SharedSubexpressionEvaluator,
+    evaluate_many,
+)
+
+VARIABLES = ["a", "b", "c", "x", "y"]
+
+
+@pytest.fixture(name="values")
+def fixture_values():
+    return dict(
+        zip(
+            VARIABLES,
+            ensemble_values(
+                ["WOPR:A-1", "WWPR:A-1", "WOPT:A-1", "x", "y"], 10**4
+            ).values(),
+        )
+    )
+
+
+def test_equal_to_evaluate(values):
+    parser = Parser()
+    expressions = [
+        parser.parse(random_expression(length, VARIABLES, seed=length % 7))
+        for length in range(10, 200, 3)
+    ]
+
+    with np.errstate(all="ignore"):
+        results, saved_evaluations = evaluate_many(expressions, values)
+        for expression, result in zip(expressions, results):
+            np.testing.assert_array_equal(result, expression.evaluate(values))
+    assert saved_evaluations > 0
+
+
+def test_errors(values):
+    parser = Parser()
+    evaluator = SharedSubexpressionEvaluator(values)
+    evaluator.add(parser.parse("a + b"))
+    with pytest.raises(ParserError, match="undefined variable: z"):
+        evaluator.add(parser.parse("(a + b) * z"))
+    evaluator.add(parser.parse("(a + b)(c)"))
+    evaluator.add(parser.parse("(a + b) * c"))
+
+    first, call, last = evaluator.evaluate()
+
+    np.testing.assert_array_equal(first, values["a"] + values["b"])
+    assert isinstance(call, ParserError)
+    np.testing.assert_array_equal(last, (values["a"] + values["b"]) * values["c"])
+
+
+def test_intermediate_results_are_released(values):
+    parser = Parser()
+    expressions = [
+        parser.parse(f"(a + b) * {i} + (a - b) / {i + 1} + c * {i} - x")
+        for i in range(200)
+    ]
+    nbytes = values["a"].nbytes
+
+    tracemalloc.start()
+    results, saved_evaluations = evaluate_many(expressions, values)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert saved_evaluations == 2 * (len(expressions) - 1)
+    # The results, the two shared subexpressions and the operands of the last operators, while
+    # keeping all intermediate results would take six arrays per expression
+    assert peak < (len(results) + 10) * nbytes
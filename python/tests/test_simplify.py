@@ -0,0 +1,66 @@
+"""Tests of constant folding and identity removal in Expression.simplify()"""
+
+import numpy as np
+import pytest
+
+from webviz_subsurface_components.py_expression_eval import Parser
+
+DTYPES = [np.int32, np.int64, np.float32, np.float64]
+
+
+@pytest.mark.parametrize("dtype", DTYPES, ids=lambda dtype: np.dtype(dtype).name)
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "x*1",
+        "1*x",
+        "x+0",
+        "0+x",
+        "x-0",
+        "x^1",
+        "x**1",
+        "x/1",
+        "x*1.0",
+        "x*(2-1)",
+        "x*(1.5-0.5)",
+        "x*(2.0*3.0)",
+        "(x*1)*1+0",
+        "sqrt(x)/1",
+        "(x/y)*1.0",
+        "x*1 + y*1",
+        "-(x*1)",
+        "1+1",
+        "PI*2",
+    ],
+)
+def test_simplify_keeps_result(expression, dtype):
+    x = np.arange(1, 6, dtype=dtype)
+    y = np.arange(2, 7, dtype=dtype)
+    parsed = Parser().parse(expression)
+    expected = parsed.evaluate({"x": x, "y": y})
+
+    simplified = parsed.simplify()
+    result = simplified.evaluate({"x": x, "y": y})
+
+    assert type(result) is type(expected)
+    assert np.result_type(result) == np.result_type(expected)
+    np.testing.assert_array_equal(result, expected)
+    assert result is not x and result is not y
+
+
+@pytest.mark.parametrize(
+    "expression, removed_operations",
+    [
+        ("x*1", 0),
+        ("x*1 + y*1", 2),
+        ("(x*1)*1+0", 2),
+        ("x/1 + y", 0),
+        ("sqrt(x)/1 + y", 1),
+        ("x*(2-1) + y", 1),
+        ("x*(1+1) + y", 1),
+    ],
+)
+def test_removed_operations(expression, removed_operations):
+    assert Parser().parse(expression).simplify().removed_operations == (
+        removed_operations
+    )
@@ -0,0 +1,98 @@
+"""Tests and benchmarks of Parser.tokenize() against the character scanning parser"""
+
+import numpy as np
+import pytest
+
+from scanning_parser import ScanningParser
+from synthetic_ensemble import INVALID_EXPRESSIONS, random_expression
+
+from webviz_subsurface_components.py_expression_eval import Parser, ParserError
+
+EXPRESSIONS = [
+    "1e5*a",
+    "1.5E-3 + .5",
+    "E",
+    "E.x + PI",
+    "PI2 * E_1",
+    "sqrt(a) + abs(-b)",
+    "ln(x) / log10(y)",
+    "a.b + _c + a_1",
+    "-a - -b + +c",
+    "2*(a+b)^2",
+    "a ** 2 % 3",
+    "a ∙ b • c",
+    "a(b)",
+    "()",
+    "sqrt",
+    "a + (b",
+    "a + b)",
+    "a b",
+    "1 2",
+    "a + # b",
+    "æøå + a",
+    "中b + a",
+    "a中 + b",
+    "a + 中",
+    "x² + 1",
+    "  a +\tb\n",
+]
+
+
+def parse_result(parser, expression):
+    """Get comparable result of parsing expression, the tokens or the error message
+
+    The scanner raises ValueError for invalid numbers as "1.2.3" and names as "e5", which it
+    scans as numbers. This is returned as None.
+    """
+    try:
+        parsed = parser.parse(expression)
+    except ParserError as e:
+        return str(e)
+    except ValueError:
+        return None
+    return [
+        (item.type_, item.index_, type(item.number_).__name__, item.number_)
+        for item in parsed.tokens
+    ]
+
+
+def random_strings(count, seed=0):
+    """Get random strings of the characters of expressions, mostly invalid expressions"""
+    rng = np.random.default_rng(seed)
+    alphabet = list("ab_E1.e5+-*/^%() ∙") + ["PI", "sqrt", "ln", "**"]
+    return [
+        "".join(rng.choice(alphabet, size=int(rng.integers(1, 15))))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    EXPRESSIONS
+    + [expression for expression in INVALID_EXPRESSIONS if ".." not in expression]
+    + [random_expression(length, ["a", "b", "c"], seed=length) for length in (50, 500)],
+)
+def test_equal_to_scanner(expression):
+    assert parse_result(Parser(), expression) == parse_result(
+        ScanningParser(), expression
+    )
+
+
+def test_equal_to_scanner_on_random_strings():
+    parser = Parser()
+    scanner = ScanningParser()
+    for expression in random_strings(5000):
+        expected = parse_result(scanner, expression)
+        if expected is not None:
+            assert parse_result(parser, expression) == expected, expression
+
+
+@pytest.mark.parametrize("parser_class", [ScanningParser, Parser])
+@pytest.mark.parametrize("length", [10, 100, 500, 1000, 2000])
+def test_parse_against_scanner(benchmark, length, parser_class):
+    parser = parser_class()
+    expression = random_expression(length, ["a", "b", "WOPR"])
+    benchmark.group = f"parse {length} characters"
+    benchmark.extra_info["length"] = len(expression)
+
+    benchmark(parser.parse, expression)
@@ -0,0 +1,74 @@
+"""Tests and benchmarks of resolving summary vector names to vector definitions"""
+
+import pytest
+
+from synthetic_ensemble import summary_vector_names
+
+from webviz_subsurface_components.VectorDefinitions import VectorDefinitionResolver
+
+
+@pytest.fixture(name="resolver", scope="module")
+def fixture_resolver():
+    return VectorDefinitionResolver()
+
+
+@pytest.mark.parametrize(
+    "name, mnemonic",
+    [
+        ("WOPR:A-1", "WOPR"),
+        ("FOPT", "FOPT"),
+        ("FOPR1", "FOPR1"),
+        ("WOPRL__1:OP_1", "WOPRL"),
+        ("WOPRL_10:OP_1", "WOPRL"),
+        ("WOPRL123:OP_1", "WOPRL"),
+        ("WGPTL__7:OP_1", "WGPTL"),
+        ("ROIP:3", "ROIP"),
+        ("ROIP_REG:3", "ROIP"),
+        ("RPR__NUM:1", "RPR"),
+        ("BPR:10,12,3", "BPR"),
+        ("WO2PR:OP_1", "WOnPR"),
+        ("BCAB123:1,1,1", "BCABnnn"),
+    ],
+)
+def test_definition(resolver, name, mnemonic):
+    index = resolver.definition_index(name.split(":", 1)[0])
+
+    assert resolver.mnemonics[index] == mnemonic
+    assert resolver.definition(name)["description"] == resolver.descriptions[index]
+
+
+@pytest.mark.parametrize(
+    "name",
+    # Completion numbers are only removed from completion vectors
+    ["NOTAVECTOR:OP_1", "WOPR__1:OP_1", "WOPR12:OP_1", "FOPT_10", ""],
+)
+def test_no_definition(resolver, name):
+    assert resolver.definition(name) is None
+
+
+def test_resolve(resolver):
+    names = summary_vector_names(1000)
+
+    definition_indices, type_indices = resolver.resolve(names)
+
+    for name, definition_index, type_index in zip(
+        names, definition_indices, type_indices
+    ):
+        definition = resolver.definition(name)
+        if definition is None:
+            assert definition_index == type_index == -1
+        else:
+            assert resolver.descriptions[definition_index] == definition["description"]
+            assert resolver.types[type_index] == definition["type"]
+    assert (definition_indices == -1).sum() < len(names) // 20
+
+
+def test_resolve_benchmark(benchmark):
+    names = summary_vector_names(500000)
+
+    # A new resolver per round, as results are cached per mnemonic
+    definition_indices, _ = benchmark.pedantic(
+        lambda: VectorDefinitionResolver().resolve(names), rounds=5
+    )
+
+    assert len(definition_indices) == len(names)
@@ -0,0 +1,64 @@
+"""Tests of reading VectorDefinitions.json on first access"""
+
+import subprocess
+import sys
+
+import pytest
+
+
+def run_python(code):
+    """Run code in a new interpreter, such that no module is imported in advance"""
+    return subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_import_does_not_read_definitions():
+    output = run_python(
+        "import sys\n"
+        "import webviz_subsurface_components as wsc\n"
+        "wsc.VectorDefinitionResolver\n"
+        "module = sys.modules['webviz_subsurface_components.VectorDefinitions']\n"
+        "print('VectorDefinitions' in vars(module), 'VectorDefinitions' in vars(wsc))\n"
+    )
+
+    assert output.split() == ["False", "False"]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "from webviz_subsurface_components import VectorDefinitions\n"
+        "print(type(VectorDefinitions).__name__, len(VectorDefinitions))",
+        "from webviz_subsurface_components.VectorDefinitions import VectorDefinitions\n"
+        "print(type(VectorDefinitions).__name__, len(VectorDefinitions))",
+        "import sys\n"
+        "import webviz_subsurface_components.VectorDefinitions\n"
+        "module = sys.modules['webviz_subsurface_components.VectorDefinitions']\n"
+        "print(type(module.VectorDefinitions).__name__, len(vars(module)['VectorDefinitions']))",
+    ],
+)
+def test_first_access_gives_plain_dict(code):
+    kind, count = run_python(code).split()
+
+    assert kind == "dict"
+    assert int(count) > 0
+
+
+def test_serialized_on_first_access():
+    # The C implementations of the serializers read the dict without calling its methods
+    pytest.importorskip("plotly")
+    output = run_python(
+        "import json\n"
+        "import orjson\n"
+        "from plotly.io.json import to_json_plotly\n"
+        "from webviz_subsurface_components import VectorDefinitions\n"
+        "print(len(json.loads(json.dumps(VectorDefinitions))))\n"
+        "print(len(orjson.loads(orjson.dumps(VectorDefinitions))))\n"
+        "print(len(json.loads(to_json_plotly(VectorDefinitions))))\n"
+        "print(len(VectorDefinitions))\n"
+    )
+
+    counts = [int(count) for count in output.split()]
+    assert counts[0] > 0
+    assert counts == [counts[-1]] * 4
@@ -0,0 +1,131 @@
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .VectorCalculatorWrapper import ExpressionInfo, VectorCalculatorWrapper
+
+
+class ExpressionGraph:
+    """Dependency graph of expressions, where computed vectors can be input to other expressions
+
+    A computed vector is named by the name of its expression, and a vector name in the
+    variableVectorMap of an expression refers to a computed vector if an expression with that
+    name is in the graph, otherwise to a vector given by set_vectors().
+
+    The expressions are evaluated in topological order. Results are cached, and after
+    set_vectors() only expressions depending on changed vectors, directly or through other
+    computed vectors, are evaluated again. A vector is changed if the given array is not the
+    same object as the previous one.
+    """
+
+    def __init__(self, expressions: List[ExpressionInfo]) -> None:
+        self._expressions: Dict[str, ExpressionInfo] = {
+            expression["name"]: expression for expression in expressions
+        }
+        self._inputs: Dict[str, Dict[str, str]] = {
+            name: VectorCalculatorWrapper.variable_vector_dict(
+                expression["variableVectorMap"]
+            )
+            for name, expression in self._expressions.items()
+        }
+        self._dependents: Dict[str, Set[str]] = {}
+        for name, inputs in self._inputs.items():
+            for vector_name in inputs.values():
+                self._dependents.setdefault(vector_name, set()).add(name)
+
+        self._order = self._topological_order()
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._results: Dict[str, Optional[np.ndarray]] = {}
+        self._dirty: Set[str] = set(self._expressions)
+
+    @property
+    def order(self) -> List[str]:
+        """Expression names in evaluation order"""
+        return list(self._order)
+
+    def _topological_order(self) -> List[str]:
+        """Kahn's algorithm, raises ValueError if the expressions have circular dependencies"""
+        in_degree = {
+            name: sum(vector in self._expressions for vector in set(inputs.values()))
+            for name, inputs in self._inputs.items()
+        }
+        queue = deque(name for name, degree in in_degree.items() if degree == 0)
+        order: List[str] = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in sorted(self._dependents.get(name, ())):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+        if len(order) != len(self._expressions):
+            circular = sorted(set(self._expressions) - set(order))
+            raise ValueError(f"Circular dependency between expressions {circular}")
+        return order
+
+    def downstream(self, vector_name: str) -> Set[str]:
+        """Get names of all expressions depending on the vector, directly or indirectly"""
+        affected: Set[str] = set()
+        queue = deque([vector_name])
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        return affected
+
+    def set_vectors(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Set vector values, and mark expressions depending on changed vectors as dirty"""
+        for vector_name, vector in vectors.items():
+            if self._vectors.get(vector_name) is vector:
+                continue
+            self._vectors[vector_name] = vector
+            self._dirty |= self.downstream(vector_name)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Mark expression and its dependents as dirty, or all expressions if name is None"""
+        if name is None:
+            self._dirty = set(self._expressions)
+        else:
+            self._dirty |= {name} | self.downstream(name)
+
+    def evaluate(self) -> Dict[str, Optional[np.ndarray]]:
+        """Evaluate dirty expressions and get results for all expressions
+
+        The result of an expression is None if the expression is invalid or an input vector is
+        missing.
+        """
+        for name in self._order:
+            if name not in self._dirty:
+                continue
+            values = self._input_values(name)
+            self._results[name] = (
+                None
+                if values is None
+                else VectorCalculatorWrapper.evaluate_expression(
+                    self._expressions[name]["expression"], values
+                )
+            )
+            self._dirty.discard(name)
+        return dict(self._results)
+
+    def _input_values(self, name: str) -> Optional[Dict[str, np.ndarray]]:
+        """Get values for the variables of expression, None if any input vector is missing"""
+        values: Dict[str, np.ndarray] = {}
+        for variable, vector_name in self._inputs[name].items():
+            vector = (
+                self._results.get(vector_name)
+                if vector_name in self._expressions
+                else self._vectors.get(vector_name)
+            )
+            if vector is None:
+                return None
+            values[variable] = vector
+        return values
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Get result of expression, evaluating dirty expressions first"""
+        if self._dirty:
+            self.evaluate()
+        return self._results.get(name)
@@ -1,13 +1,40 @@
+import hashlib
 import re
+import threading
 import warnings
-from functools import wraps
-from typing import Dict, List, TypedDict, Union
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 import numpy as np
+import pandas as pd
 
-from .py_expression_eval import Parser, ParserError
+from .compact_arrays import ConstantArray, SparseArray
+from .py_expression_eval import Expression, Parser, ParserError
+from .shared_subexpressions import SharedSubexpressionEvaluator
 from .VectorCalculator import VectorCalculator
 
+# Split if positive lookahead or positive lookbehind character is not character a-zA-Z0-9
+# to keep string split separator.
+# Doc: https://medium.com/@shemar.gordon32/how-to-split-and-keep-the-delimiter-s-d433fb697c65
+#
+# Note: re.split() usage requires Python version >= 3.7 due to pattern that could match an
+# empty string.
+# Doc: https://docs.python.org/3/library/re.html#re.split
+_DETAILED_EXPRESSION_SPLIT = re.compile("(?=[^a-zA-Z0-9])|(?<=[^a-zA-Z0-9])")
+
 
 class VariableVectorMapInfo(TypedDict):
     """
@@ -96,8 +123,257 @@ class ExternalParseData(TypedDict):
     message: str
 
 
+class ExpressionCacheStats(TypedDict):
+    """
+    Expression cache statistics
+
+    `Description`:\n
+    Dictionary with usage counters for an ExpressionCache
+
+    `Required keys`:
+    * hits: int, number of lookups served from the cache
+    * misses: int, number of lookups which required parsing
+    * evictions: int, number of expressions evicted due to the size limit
+    * size: int, number of cached expressions
+    * maxsize: int, maximum number of cached expressions
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class ExpressionCache:
+    """Bounded LRU cache of parsed expressions
+
+    Parsed Expression objects are cached on the normalized expression string, such that
+    repeated parsing and evaluation of the same expression only tokenizes it once. The cached
+    expressions are simplified, see Expression.simplify(). For expressions failing to parse the
+    error message is cached, such that invalid expressions are only parsed once as well. Messages
+    are cached on the expression string as given, as they contain the expression and the error
+    column.
+
+    The cache can be shared between threads, parsing is done outside of the lock.
+    """
+
+    def __init__(self, parser: Parser, maxsize: int = 512) -> None:
+        self._parser = parser
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._expressions: "OrderedDict[str, Union[Expression, str]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def normalize(expression: str) -> str:
+        return expression.strip()
+
+    def get(self, expression: str) -> Expression:
+        """Get parsed expression, parse and cache it if not present
+
+        Raises ParserError if the expression is invalid
+        """
+        parsed_expr, message = self.lookup(expression)
+        if parsed_expr is None:
+            raise ParserError(message)
+        return parsed_expr
+
+    def lookup(self, expression: str) -> Tuple[Optional[Expression], str]:
+        """Get parsed expression and empty message, or None and parse error message
+
+        As get(), but without raising ParserError for invalid expressions
+        """
+        normalized = ExpressionCache.normalize(expression)
+        with self._lock:
+            key = normalized
+            cached = self._expressions.get(key)
+            if not isinstance(cached, Expression):
+                key = expression
+                cached = self._expressions.get(key)
+            if cached is not None:
+                self._expressions.move_to_end(key)
+                self._hits += 1
+                return (None, cached) if isinstance(cached, str) else (cached, "")
+            self._misses += 1
+
+        try:
+            parsed_expr: Optional[Expression] = self._parser.parse(
+                expression
+            ).simplify()
+            message = ""
+        except ParserError as e:
+            parsed_expr = None
+            message = str(e)
+        with self._lock:
+            if parsed_expr is None:
+                self._expressions[expression] = message
+            else:
+                self._expressions[normalized] = parsed_expr
+            if len(self._expressions) > self._maxsize:
+                self._expressions.popitem(last=False)
+                self._evictions += 1
+        return parsed_expr, message
+
+    def stats(self) -> ExpressionCacheStats:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._expressions),
+                "maxsize": self._maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expressions.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+class ResultMemoStats(TypedDict):
+    """
+    Result memo statistics
+
+    `Description`:\n
+    Dictionary with usage counters for a ResultMemo
+
+    `Required keys`:
+    * hits: int, number of evaluations served from the memo
+    * misses: int, number of evaluations not found in the memo
+    * evictions: int, number of results evicted due to the byte budget
+    * size: int, number of memoized results
+    * bytes: int, total number of bytes of memoized results
+    * max_bytes: int, byte budget for memoized results
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    bytes: int
+    max_bytes: int
+
+
+class ResultMemo:
+    """Memo of evaluation results, keyed on expression and fingerprints of the input arrays
+
+    The fingerprint of an input array is its identity, data pointer, shape, strides and dtype,
+    and the identity for ConstantArray and SparseArray inputs.
+    Entries keep weak references to the input arrays, and are invalid when an input array is
+    deleted. Arrays modified in place keep their fingerprint, thus inputs must not be modified
+    while memoized, unless hash_inputs is set to include a hash of the array data in the
+    fingerprint. Memoized results are set read-only.
+
+    Results are evicted in least recently used order when the total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2, hash_inputs: bool = False):
+        self._max_bytes = max_bytes
+        self._hash_inputs = hash_inputs
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[np.ndarray, List[weakref.ref]]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, expression: str, values: Dict[str, Any]) -> Hashable:
+        return (
+            ExpressionCache.normalize(expression),
+            tuple((name, self._fingerprint(values[name])) for name in sorted(values)),
+        )
+
+    def _fingerprint(self, value: Any) -> Hashable:
+        if isinstance(value, (ConstantArray, SparseArray)):
+            return (id(value),)
+        if not isinstance(value, np.ndarray):
+            return repr(value)
+        fingerprint = (
+            id(value),
+            value.__array_interface__["data"][0],
+            value.shape,
+            value.strides,
+            value.dtype.str,
+        )
+        if self._hash_inputs:
+            data = np.ascontiguousarray(value).view(np.uint8)
+            fingerprint += (hashlib.blake2b(data, digest_size=16).hexdigest(),)
+        return fingerprint
+
+    @staticmethod
+    def _arrays(values: Dict[str, Any]) -> List[Any]:
+        return [
+            values[name]
+            for name in sorted(values)
+            if isinstance(values[name], (np.ndarray, ConstantArray, SparseArray))
+        ]
+
+    def get(self, key: Hashable, values: Dict[str, Any]) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, references = entry
+                arrays = ResultMemo._arrays(values)
+                if len(arrays) == len(references) and all(
+                    reference() is array for reference, array in zip(references, arrays)
+                ):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return result
+                self._remove(key)
+            self._misses += 1
+            return None
+
+    def put(self, key: Hashable, values: Dict[str, Any], result: np.ndarray) -> None:
+        if not isinstance(result, np.ndarray) or result.nbytes > self._max_bytes:
+            return
+        arrays = ResultMemo._arrays(values)
+        if not any(result is array for array in arrays):
+            result.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, [weakref.ref(array) for array in arrays])
+            self._bytes += result.nbytes
+            while self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        result, _ = self._entries.pop(key)
+        self._bytes -= result.nbytes
+
+    def stats(self) -> ResultMemoStats:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
 class VectorCalculatorWrapper(VectorCalculator):
     parser = Parser()
+    expression_cache = ExpressionCache(parser)
+    result_memo: Optional[ResultMemo] = None
     max_description_length = 50
 
     @wraps(VectorCalculator)
@@ -111,86 +387,399 @@ class VectorCalculatorWrapper(VectorCalculator):
 
     @staticmethod
     def parse_expression(expression: str) -> str:
-        VectorCalculatorWrapper.parser.parse(expression)
+        VectorCalculatorWrapper.expression_cache.get(expression)
         return expression
 
     @staticmethod
-    def external_parse_data(expression: ExpressionInfo) -> ExternalParseData:
-        try:
-            expression_string = VectorCalculatorWrapper.parse_expression(
-                expression["expression"]
-            )
-            variables = VectorCalculatorWrapper.parser.parse(
-                expression_string
-            ).variables()
+    def parsed_expression(expression: str) -> Expression:
+        """Get parsed expression from the expression cache
 
-            return {
-                "expression": expression_string,
-                "id": expression["id"],
-                "variables": variables,
-                "isValid": True,
-                "message": "",
-            }
-        except ParserError as e:
-            return {
-                "expression": expression["expression"],
-                "id": expression["id"],
-                "variables": [],
-                "isValid": False,
-                "message": "" if len(expression["expression"]) == 0 else str(e),
-            }
+        Raises ParserError if the expression is invalid
+        """
+        return VectorCalculatorWrapper.expression_cache.get(expression)
+
+    @staticmethod
+    def expression_cache_stats() -> ExpressionCacheStats:
+        return VectorCalculatorWrapper.expression_cache.stats()
+
+    @staticmethod
+    def enable_result_memo(
+        max_bytes: int = 256 * 1024**2, hash_inputs: bool = False
+    ) -> None:
+        """Memoize results of evaluate_expression(), see ResultMemo"""
+        VectorCalculatorWrapper.result_memo = ResultMemo(max_bytes, hash_inputs)
+
+    @staticmethod
+    def disable_result_memo() -> None:
+        VectorCalculatorWrapper.result_memo = None
+
+    @staticmethod
+    def result_memo_stats() -> Optional[ResultMemoStats]:
+        memo = VectorCalculatorWrapper.result_memo
+        return None if memo is None else memo.stats()
 
+    @staticmethod
+    def external_parse_data(expression: ExpressionInfo) -> ExternalParseData:
+        return VectorCalculatorWrapper.validate_expressions([expression])[0]
+
+    @staticmethod
     def validate_expression(expression: ExpressionInfo) -> bool:
-        try:
-            VectorCalculatorWrapper.parse_expression(expression["expression"])
-        except ParserError as e:
-            return False
-        return True
+        parsed_expr, _ = VectorCalculatorWrapper.expression_cache.lookup(
+            expression["expression"]
+        )
+        return parsed_expr is not None
 
     @staticmethod
-    def evaluate_expression(
-        expression: str, values: Dict[str, np.ndarray]
-    ) -> Union[np.ndarray, None]:
-        # Ensure variables in expression
-        invalid_variables = [var for var in values if var not in expression]
+    def validate_expressions(
+        expressions: List[ExpressionInfo],
+    ) -> List[ExternalParseData]:
+        """Get external parse data for list of expressions
+
+        Equal expression strings are only looked up once, and invalid expressions give isValid
+        False and the parse error message without raising ParserError. Returns parse data in the
+        order of the expressions, as for external_parse_data().
+        """
+        parsed: Dict[str, Tuple[List[str], bool, str]] = {}
+        parse_data: List[ExternalParseData] = []
+        for expression in expressions:
+            expression_string = expression["expression"]
+            if expression_string not in parsed:
+                parsed_expr, message = VectorCalculatorWrapper.expression_cache.lookup(
+                    expression_string
+                )
+                parsed[expression_string] = (
+                    ([], False, "" if len(expression_string) == 0 else message)
+                    if parsed_expr is None
+                    else (parsed_expr.variables(), True, "")
+                )
+            variables, is_valid, message = parsed[expression_string]
+            parse_data.append(
+                {
+                    "expression": expression_string,
+                    "id": expression["id"],
+                    "variables": list(variables),
+                    "isValid": is_valid,
+                    "message": message,
+                }
+            )
+        return parse_data
+
+    @staticmethod
+    def _has_invalid_variables(expression: str, variables: Dict[str, Any]) -> bool:
+        """Check if any variable is not present in expression, warning about these variables"""
+        invalid_variables = [var for var in variables if var not in expression]
         if len(invalid_variables) > 0:
             warnings.warn(
                 f"Variables {invalid_variables} is not present in expression '{expression}'"
             )
+            return True
+        return False
+
+    @staticmethod
+    def evaluate_expression(
+        expression: str,
+        values: Dict[str, np.ndarray],
+        out: Optional[np.ndarray] = None,
+    ) -> Union[np.ndarray, None]:
+        """Evaluate expression with vector values for the variables
+
+        If out is given, intermediate arrays are reused and the result is written into out,
+        see Expression.evaluate_inplace().
+
+        If the result memo is enabled, see enable_result_memo(), results for the same expression
+        and input arrays are reused. Memoized results are read-only.
+        """
+        if VectorCalculatorWrapper._has_invalid_variables(expression, values):
+            return None
+        memo = VectorCalculatorWrapper.result_memo
+        if memo is not None and out is None:
+            key = memo.key(expression, values)
+            result = memo.get(key, values)
+            if result is not None:
+                return result
+        try:
+            parsed_expr = VectorCalculatorWrapper.parsed_expression(expression)
+            if out is not None:
+                return parsed_expr.evaluate_inplace(values, out=out)
+            result = parsed_expr.compile()(values)
+        except ParserError as e:
+            return None
+        if memo is not None:
+            memo.put(key, values, result)
+        return result
+
+    @staticmethod
+    def evaluate_expression_stream(
+        expression: str, chunks: Dict[str, Any]
+    ) -> Optional[Iterator[np.ndarray]]:
+        """Evaluate expression for iterables of aligned vector chunks
+
+        `Arguments`:
+        * expression: str, mathematical expression
+        * chunks: Dict[str, Any], iterable of chunks per variable, e.g. per realization or per date
+        window from a file reader, or a number or array used for all chunks
+
+        Returns iterator yielding the result for each step of the chunk iterables, such that
+        computed vectors can be written chunk by chunk, or None if the expression is invalid.
+        The chunks are read lazily while iterating, see Expression.evaluate_stream().
+        """
+        if VectorCalculatorWrapper._has_invalid_variables(expression, chunks):
+            return None
+        try:
+            parsed_expr = VectorCalculatorWrapper.parsed_expression(expression)
+        except ParserError:
+            return None
+        if any(variable not in chunks for variable in parsed_expr.variables()):
+            return None
+        return parsed_expr.evaluate_stream(chunks)
+
+    @staticmethod
+    def evaluate_ensemble(
+        expression: str,
+        values: Dict[str, np.ndarray],
+        realization_mask: Optional[np.ndarray] = None,
+    ) -> Union[np.ndarray, None]:
+        """Evaluate expression for vectors of all realizations in an ensemble at once
+
+        `Arguments`:
+        * expression: str, mathematical expression
+        * values: Dict[str, np.ndarray], 2-D array of shape (realizations, timesteps) per variable,
+        e.g. from ensemble_frame_values()
+        * realization_mask: Optional[np.ndarray], boolean array per realization. Realizations where
+        False are not evaluated and are NaN in the result. The inputs are not copied.
+
+        Returns 2-D array of shape (realizations, timesteps), or None if the expression is invalid.
+        """
+        if VectorCalculatorWrapper._has_invalid_variables(expression, values):
             return None
+        where = (
+            None
+            if realization_mask is None
+            else np.asarray(realization_mask, dtype=bool)[:, np.newaxis]
+        )
         try:
-            expression = VectorCalculatorWrapper.parse_expression(expression)
-            parsed_expr = VectorCalculatorWrapper.parser.parse(expression)
-            return parsed_expr.evaluate(values)
+            parsed_expr = VectorCalculatorWrapper.parsed_expression(expression)
+            return parsed_expr.evaluate_inplace(values, where=where)
         except ParserError as e:
             return None
 
+    @staticmethod
+    def ensemble_frame_values(
+        frame: pd.DataFrame,
+        variable_vector_map: List[VariableVectorMapInfo],
+        realization_column: str = "REAL",
+        date_column: str = "DATE",
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """Get 2-D variable values for evaluate_ensemble() from long-format frame
+
+        The frame has a row per realization and date, with a column per vector. Returns dict of
+        arrays of shape (realizations, dates) per variable, and the sorted unique realizations and
+        dates. Realization and date pairs missing in the frame are NaN.
+        """
+        realizations, realization_index = np.unique(
+            frame[realization_column].to_numpy(), return_inverse=True
+        )
+        dates, date_index = np.unique(
+            frame[date_column].to_numpy(), return_inverse=True
+        )
+        values: Dict[str, np.ndarray] = {}
+        for variable, vector in VectorCalculatorWrapper.variable_vector_dict(
+            variable_vector_map
+        ).items():
+            column = frame[vector].to_numpy()
+            array = np.full(
+                (len(realizations), len(dates)),
+                np.nan,
+                dtype=np.result_type(column.dtype, np.float16),
+            )
+            array[realization_index, date_index] = column
+            values[variable] = array
+        return values, realizations, dates
+
+    @staticmethod
+    def frame_column_values(column: pd.Series) -> np.ndarray:
+        """Get values of frame column as numpy array, without copying if possible
+
+        Columns with numpy dtypes are returned as views. Nullable and other extension dtypes are
+        converted to float, with NaN for missing values.
+        """
+        if isinstance(column.dtype, np.dtype):
+            return column.to_numpy(copy=False)
+        return column.to_numpy(dtype=float, na_value=np.nan)
+
+    @staticmethod
+    def evaluate_frame(
+        expression: str,
+        frame: Any,
+        variable_vector_map: List[VariableVectorMapInfo],
+        column_name: Optional[str] = None,
+    ) -> Any:
+        """Evaluate expression with vectors from the columns of a frame
+
+        `Arguments`:
+        * expression: str, mathematical expression
+        * frame: pandas.DataFrame or pyarrow.Table, with a column per vector
+        * variable_vector_map: List[VariableVectorMapInfo], map from variable to column name
+        * column_name: Optional[str], name of the result column, defaults to the expression
+
+        The result is added as a new column. A DataFrame is modified in place and returned, while
+        a new Table sharing the column data of the given one is returned for pyarrow. Columns are
+        read without copying where possible, and chunked Arrow columns are evaluated chunk by
+        chunk. Returns None if the expression is invalid.
+        """
+        variables = VectorCalculatorWrapper.variable_vector_dict(variable_vector_map)
+        if column_name is None:
+            column_name = expression
+
+        if isinstance(frame, pd.DataFrame):
+            values = {
+                variable: VectorCalculatorWrapper.frame_column_values(frame[vector])
+                for variable, vector in variables.items()
+            }
+            result = VectorCalculatorWrapper.evaluate_expression(expression, values)
+            if result is None:
+                return None
+            frame[column_name] = result
+            return frame
+
+        # pylint: disable=import-outside-toplevel
+        import pyarrow as pa
+
+        # Batches of the selected columns share chunk boundaries, slicing chunks if needed
+        vectors = list(dict.fromkeys(variables.values()))
+        selected = frame.select(vectors)
+        # Batches with nulls are converted to float with NaN, thus the result is float64 for all
+        # batches of nullable columns, such that the chunks of the result column share dtype
+        nullable = any(
+            selected.schema.field(vector).nullable or selected.column(vector).null_count
+            for vector in vectors
+        )
+        results = []
+        for batch in selected.to_batches():
+            values = {
+                variable: batch.column(vectors.index(vector)).to_numpy(
+                    zero_copy_only=False
+                )
+                for variable, vector in variables.items()
+            }
+            result = VectorCalculatorWrapper.evaluate_expression(expression, values)
+            if result is None:
+                return None
+            results.append(np.broadcast_to(result, (batch.num_rows,)))
+        dtype = (
+            np.dtype(np.float64)
+            if nullable or not results
+            else np.result_type(*results)
+        )
+        chunks = [pa.array(result.astype(dtype, copy=False)) for result in results]
+        return frame.append_column(
+            column_name, pa.chunked_array(chunks, type=pa.from_numpy_dtype(dtype))
+        )
+
+    @staticmethod
+    def evaluate_expressions(
+        expressions_and_values: List[Tuple[str, Dict[str, np.ndarray]]],
+        max_workers: Optional[int] = None,
+    ) -> List[Union[np.ndarray, None]]:
+        """Evaluate list of expression and values pairs in a thread pool
+
+        Return list of results in the order of the input pairs, where each result is as
+        for evaluate_expression(). numpy releases the GIL in its ufuncs, thus evaluation of
+        large vectors runs in parallel.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda item: VectorCalculatorWrapper.evaluate_expression(*item),
+                    expressions_and_values,
+                )
+            )
+
+    @staticmethod
+    def evaluate_many(
+        expressions: List[str], values: Dict[str, np.ndarray]
+    ) -> Tuple[List[Union[np.ndarray, None]], int]:
+        """Evaluate expressions with shared vector values
+
+        Subexpressions common to the expressions, e.g. WOPT+WWPT in (WOPT+WWPT)/x and
+        (WOPT+WWPT)*y, are evaluated once. Returns list of results in the order of the
+        expressions, with None for invalid expressions, and the number of saved operator
+        evaluations.
+
+        Equal subexpressions give the same array object in the results, which therefore should not
+        be modified in place.
+        """
+        evaluator = SharedSubexpressionEvaluator(values)
+        added: List[bool] = []
+        for expression in expressions:
+            try:
+                evaluator.add(VectorCalculatorWrapper.parsed_expression(expression))
+                added.append(True)
+            except ParserError:
+                added.append(False)
+        evaluated = iter(evaluator.evaluate())
+        results: List[Union[np.ndarray, None]] = []
+        for is_added in added:
+            result = next(evaluated) if is_added else None
+            results.append(None if isinstance(result, ParserError) else result)
+        return results, evaluator.saved_evaluations
+
     @staticmethod
     def detailed_expression(expression: ExpressionInfo) -> str:
         """Get detailed expression
 
-        Return expression where variable name is replaced with vector name
+        Return expression where variable name is replaced with vector name. Results are cached on
+        the expression and the variable vector map.
         """
-        expr: str = expression["expression"]
-        var_vec_dict = VectorCalculatorWrapper.variable_vector_dict(
-            expression["variableVectorMap"]
+        return VectorCalculatorWrapper._detailed_expression(
+            expression["expression"],
+            tuple(
+                (elm["variableName"], elm["vectorName"][0])
+                for elm in expression["variableVectorMap"]
+            ),
         )
 
-        # Split if positive lookahead or positive lookbehind character is not character a-zA-Z0-9
-        # to keep string split separator.
-        # Doc: https://medium.com/@shemar.gordon32/how-to-split-and-keep-the-delimiter-s-d433fb697c65
-        #
-        # Note: re.split() usage requires Python version >= 3.7 due to pattern that could match an
-        # empty string.
-        # Doc: https://docs.python.org/3/library/re.html#re.split
-        expr_split: List[str] = re.split("(?=[^a-zA-Z0-9])|(?<=[^a-zA-Z0-9])", expr)
+    @staticmethod
+    def detailed_expressions(expressions: List[ExpressionInfo]) -> List[str]:
+        """Get detailed expression for each expression in list, see detailed_expression()"""
+        return [
+            VectorCalculatorWrapper.detailed_expression(expression)
+            for expression in expressions
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _detailed_expression(
+        expr: str, var_vec_pairs: Tuple[Tuple[str, str], ...]
+    ) -> str:
+        """Replace variable tokens of expression with vector names
+
+        The variable positions are given by the tokens of the parser. Parts of a variable token
+        split by characters other than a-zA-Z0-9 are replaced as well, as is done for the whole
+        expression if it is invalid.
+        """
+        var_vec_dict = dict(var_vec_pairs)
+
+        def replace_parts(text: str) -> str:
+            return "".join(
+                var_vec_dict.get(elm, elm)
+                for elm in _DETAILED_EXPRESSION_SPLIT.split(text)
+            )
+
+        parsed_expr, _ = VectorCalculatorWrapper.expression_cache.lookup(expr)
+        if parsed_expr is None:
+            return replace_parts(expr)
+        spans = VectorCalculatorWrapper.parser.variable_spans(expr)
 
         detailed_expr: List[str] = []
-        for elm in expr_split:
-            if elm in var_vec_dict.keys():
-                detailed_expr.append(var_vec_dict[elm])
-                continue
-            detailed_expr.append(elm)
+        pos = 0
+        for start, end, name in spans:
+            detailed_expr.append(expr[pos:start])
+            detailed_expr.append(
+                var_vec_dict[name] if name in var_vec_dict else replace_parts(name)
+            )
+            pos = end
+        detailed_expr.append(expr[pos:])
         return "".join(detailed_expr)
 
     @staticmethod
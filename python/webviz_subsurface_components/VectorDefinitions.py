@@ -1,6 +1,14 @@
 import json
 import pathlib
-from typing import Dict, TypedDict
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
+
+import numpy as np
+
+# Well completion number suffix, padded with "_" to eight characters of mnemonic and number,
+# e.g. WOPRL__1, WOPRL_10 and WOPRL123
+_COMPLETION_SUFFIX = re.compile(r"_*\d+$")
 
 
 class VectorDefinition(TypedDict):
@@ -8,6 +16,126 @@ class VectorDefinition(TypedDict):
     type: str
 
 
-VectorDefinitions: Dict[str, VectorDefinition] = json.loads(
-    (pathlib.Path(__file__).parent / "VectorDefinitions.json").read_text()
-)
+# Read on first access of VectorDefinitions, see __getattr__()
+VectorDefinitions: Dict[str, VectorDefinition]
+
+_VECTOR_DEFINITIONS_PATH = pathlib.Path(__file__).parent / "VectorDefinitions.json"
+_load_lock = threading.Lock()
+
+
+def _vector_definitions() -> Dict[str, VectorDefinition]:
+    """Get the vector definitions, reading VectorDefinitions.json once across threads"""
+    with _load_lock:
+        definitions = globals().get("VectorDefinitions")
+        if definitions is None:
+            definitions = json.loads(_VECTOR_DEFINITIONS_PATH.read_text())
+            globals()["VectorDefinitions"] = definitions
+    return definitions
+
+
+def __getattr__(name: str):
+    """Read VectorDefinitions on first access instead of when importing the module
+
+    The definitions are a plain dict bound as module global once read, thus later accesses do
+    not call this function, and code as json.dumps() sees all definitions.
+    """
+    if name == "VectorDefinitions":
+        return _vector_definitions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class VectorDefinitionResolver:
+    """Resolve full summary vector names to vector definitions in bulk
+
+    The mnemonic of a vector name is the part before ":", e.g. WOPR for WOPR:A-1, ROIP for
+    ROIP:3 and BPR for BPR:10,12,3. Mnemonics not in the definitions are resolved by the rules:
+
+    - Completion number suffix of completion vectors is removed, e.g. WOPRL__1, WOPRL_10 and
+      WOPRL123 give WOPRL
+    - Region set suffix of region vectors is removed, e.g. ROIP_REG and RPR__NUM give ROIP and RPR
+    - Digits are matched to the "n" placeholders, e.g. WO2PR gives WOnPR and BCAB123 gives BCABnnn
+
+    Definitions are indexed by mnemonic in a dict, and the result for each mnemonic is cached,
+    thus each distinct mnemonic is only resolved once.
+    """
+
+    def __init__(
+        self, definitions: Optional[Dict[str, VectorDefinition]] = None
+    ) -> None:
+        definitions = _vector_definitions() if definitions is None else definitions
+        self.mnemonics: List[str] = list(definitions)
+        self.descriptions: List[str] = [
+            definitions[mnemonic]["description"] for mnemonic in self.mnemonics
+        ]
+        self.types: List[str] = sorted(
+            {definitions[mnemonic]["type"] for mnemonic in self.mnemonics}
+        )
+        self.definition_types: np.ndarray = np.array(
+            [
+                self.types.index(definitions[mnemonic]["type"])
+                for mnemonic in self.mnemonics
+            ],
+            dtype=np.int16,
+        )
+        self._index: Dict[str, int] = {
+            mnemonic: i for i, mnemonic in enumerate(self.mnemonics)
+        }
+        self._resolved: Dict[str, int] = dict(self._index)
+
+    def definition_index(self, mnemonic: str) -> int:
+        """Get index of definition for mnemonic, -1 if not found"""
+        index = self._resolved.get(mnemonic)
+        if index is None:
+            index = self._lookup(mnemonic)
+            self._resolved[mnemonic] = index
+        return index
+
+    def _lookup(self, mnemonic: str) -> int:
+        completion = self._index.get(_COMPLETION_SUFFIX.sub("", mnemonic), -1)
+        if (
+            completion >= 0
+            and self.types[self.definition_types[completion]] == "completion"
+        ):
+            return completion
+
+        if mnemonic.startswith("R") and "_" in mnemonic:
+            region = self._index.get(mnemonic.split("_", 1)[0], -1)
+            if region >= 0 and self.types[self.definition_types[region]].startswith(
+                "region"
+            ):
+                return region
+
+        if any(character.isdigit() for character in mnemonic):
+            for placeholder in (
+                re.sub(r"\d", "n", mnemonic),
+                re.sub(r"\d+", "n", mnemonic),
+            ):
+                if placeholder in self._index:
+                    return self._index[placeholder]
+        return -1
+
+    def resolve(self, names: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Get definition and type indices for vector names
+
+        Returns arrays with index into mnemonics and descriptions, and index into types, for each
+        name. Both are -1 for names without definition.
+        """
+        definition_index = self.definition_index
+        definition_indices = np.fromiter(
+            (definition_index(name.split(":", 1)[0]) for name in names),
+            dtype=np.int32,
+        )
+        type_indices = np.where(
+            definition_indices >= 0, self.definition_types[definition_indices], -1
+        ).astype(np.int16)
+        return definition_indices, type_indices
+
+    def definition(self, name: str) -> Optional[VectorDefinition]:
+        """Get definition of a single vector name, None if not found"""
+        index = self.definition_index(name.split(":", 1)[0])
+        if index < 0:
+            return None
+        return {
+            "description": self.descriptions[index],
+            "type": self.types[self.definition_types[index]],
+        }
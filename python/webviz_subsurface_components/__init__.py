@@ -6,25 +6,124 @@
 
 from __future__ import print_function as _
 
+import ast as _ast
+import importlib as _importlib
 import json
 import os as _os
 import sys as _sys
+import types as _types
 import warnings
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as _get_version
 
-import dash as _dash
+from . import bundles as _bundles
 
-from ._imports_ import *
-from ._imports_ import __all__
-from .py_expression_eval import Parser
-from .VectorCalculatorWrapper import (
-    ExpressionInfo,
-    ExternalParseData,
-    VariableVectorMapInfo,
+
+def _read_imports(path):
+    """Get __all__ and map from name to (module, attribute) of the generated _imports_.py
+
+    The file is parsed instead of imported, as importing it imports all components.
+    """
+    with open(path, encoding="utf8") as file:
+        tree = _ast.parse(file.read())
+    names = {}
+    component_names = []
+    for node in tree.body:
+        if isinstance(node, _ast.ImportFrom) and node.level == 1:
+            for alias in node.names:
+                names[alias.asname or alias.name] = (node.module, alias.name)
+        elif isinstance(node, _ast.Assign) and any(
+            isinstance(target, _ast.Name) and target.id == "__all__"
+            for target in node.targets
+        ):
+            component_names = _ast.literal_eval(node.value)
+    return component_names, names
+
+
+__all__, _lazy_names = _read_imports(
+    _os.path.join(_os.path.dirname(__file__), "_imports_.py")
 )
-from .VectorCalculatorWrapper import VectorCalculatorWrapper as VectorCalculator
-from .VectorDefinitions import VectorDefinition, VectorDefinitions
+_lazy_names.update(
+    {
+        "ExpressionGraph": ("ExpressionGraph", "ExpressionGraph"),
+        "Parser": ("py_expression_eval", "Parser"),
+        "ExpressionInfo": ("VectorCalculatorWrapper", "ExpressionInfo"),
+        "ExternalParseData": ("VectorCalculatorWrapper", "ExternalParseData"),
+        "VariableVectorMapInfo": ("VectorCalculatorWrapper", "VariableVectorMapInfo"),
+        "VectorCalculator": ("VectorCalculatorWrapper", "VectorCalculatorWrapper"),
+        "VectorDefinition": ("VectorDefinitions", "VectorDefinition"),
+        "VectorDefinitionResolver": ("VectorDefinitions", "VectorDefinitionResolver"),
+        "VectorDefinitions": ("VectorDefinitions", "VectorDefinitions"),
+    }
+)
+
+# Submodules which are package attributes once imported, as when imported by the package itself
+_lazy_submodules = ("py_expression_eval", "VectorCalculatorWrapper")
+
+# Modules not depending on dash
+_dash_free_modules = ("py_expression_eval", "VectorDefinitions")
+
+
+def _check_dash():
+    # pylint: disable=import-outside-toplevel
+    import dash as _dash
+
+    if not hasattr(_dash, "development"):
+        print(
+            "Dash was not successfully imported. "
+            "Make sure you don't have a file "
+            'named \n"dash.py" in your current directory.',
+            file=_sys.stderr,
+        )
+        _sys.exit(1)
+
+
+def _bind_loaded():
+    """Bind public names of loaded modules, and attach _js_dist to loaded components
+
+    Importing a submodule sets it as attribute of the package, which for most submodules has the
+    name of a public class or object. These are rebound to the public objects. Attributes are
+    looked up in the module dict, thus attributes loaded by a module __getattr__(), as
+    VectorDefinitions, are not loaded until accessed.
+    """
+    for name, (module_name, attribute) in _lazy_names.items():
+        module = _sys.modules.get(f"{__name__}.{module_name}")
+        if module is not None and attribute in vars(module):
+            globals()[name] = getattr(module, attribute)
+            if name in __all__:
+                setattr(globals()[name], "_js_dist", _js_dist)
+
+
+def __getattr__(name):
+    """Import components, other public names and submodules on first access"""
+    if name in _lazy_submodules:
+        if name not in _dash_free_modules:
+            _check_dash()
+        return _importlib.import_module(f".{name}", __name__)
+    if name not in _lazy_names:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _lazy_names[name]
+    if module_name not in _dash_free_modules:
+        _check_dash()
+    _importlib.import_module(f".{module_name}", __name__)
+    _bind_loaded()
+    return getattr(_sys.modules[f"{__name__}.{module_name}"], attribute)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | set(_lazy_submodules))
+
+
+# pylint: disable=too-few-public-methods
+class _LazyModule(_types.ModuleType):
+    """Package module keeping public names when submodules of the same name are imported"""
+
+    def __setattr__(self, name, value):
+        if name in _lazy_names and isinstance(value, _types.ModuleType):
+            self.__dict__.pop(name, None)
+            return
+        super().__setattr__(name, value)
+
 
 try:
     __version__ = _get_version(__name__)
@@ -32,15 +131,6 @@ except PackageNotFoundError:
     # package is not installed
     pass
 
-if not hasattr(_dash, "development"):
-    print(
-        "Dash was not successfully imported. "
-        "Make sure you don't have a file "
-        'named \n"dash.py" in your current directory.',
-        file=_sys.stderr,
-    )
-    _sys.exit(1)
-
 _basepath = _os.path.dirname(__file__)
 _filepath = _os.path.abspath(_os.path.join(_basepath, "package-info.json"))
 with open(_filepath, encoding="utf8") as f:
@@ -58,6 +148,9 @@ _current_path = _os.path.dirname(_os.path.abspath(__file__))
 
 _this_module = _sys.modules[__name__]
 
+# Content hashed names of precompressed bundles, if prepared by precompress_bundles.py
+_bundle_manifest = _bundles.read_bundle_manifest(_current_path)
+
 async_resources = [
     "group-tree",
     "subsurface-viewer",
@@ -66,39 +159,137 @@ async_resources = [
     "well-log-viewer",
 ]
 
-_js_dist = [
-    {
-        "relative_package_path": "webviz_subsurface_components.min.js",
-        "namespace": package_name,
-    },
-    {
-        "relative_package_path": "webviz_subsurface_components.min.js.map",
-        "namespace": package_name,
-        "dynamic": True,
-    },
-]
+# Async chunk loaded by each component
+component_async_resources = {
+    "GroupTree": "group-tree",
+    "SubsurfaceViewer": "subsurface-viewer",
+    "ViewAnnotation": "view-annotation",
+    "ViewFooter": "view-footer",
+    "WellLogViewer": "well-log-viewer",
+}
+
+
+def _build_js_dist(components=None, source_maps=True):
+    """Get _js_dist with async chunks of components, all chunks if components is None"""
+    if components is None:
+        resources = async_resources
+    else:
+        unknown = sorted(set(components) - set(__all__))
+        if unknown:
+            raise ValueError(
+                f"Unknown components {unknown}, expected names in {__all__}"
+            )
+        resources = [
+            resource
+            for resource in async_resources
+            if any(
+                component_async_resources.get(component) == resource
+                for component in components
+            )
+        ]
 
-_js_dist.extend(
-    [
+    js_dist = [
         {
-            "relative_package_path": f"async-webviz-{async_resource}.js",
+            "relative_package_path": _bundles.bundle_path(
+                _bundle_manifest, "webviz_subsurface_components.min.js"
+            ),
             "namespace": package_name,
-            "async": True,
         }
-        for async_resource in async_resources
     ]
-)
+    js_dist.extend(
+        [
+            {
+                "relative_package_path": f"async-webviz-{async_resource}.js",
+                "namespace": package_name,
+                "async": True,
+            }
+            for async_resource in resources
+        ]
+    )
+    if source_maps:
+        js_dist.extend(
+            [
+                {
+                    "relative_package_path": path,
+                    "namespace": package_name,
+                    "dynamic": True,
+                }
+                for path in ["webviz_subsurface_components.min.js.map"]
+                + [
+                    f"async-webviz-{async_resource}.js.map"
+                    for async_resource in resources
+                ]
+            ]
+        )
+    return js_dist
 
-_js_dist.extend(
-    [
-        {
-            "relative_package_path": f"async-webviz-{async_resource}.js.map",
-            "namespace": package_name,
-            "dynamic": True,
-        }
-        for async_resource in async_resources
+
+def register_async_chunks(components=None, source_maps=True):
+    """Register only the async chunks used by components, and optionally no source maps
+
+    Must be called before the Dash app serves its first page. Components is a list of the names
+    of the components used by the app, e.g. ["SubsurfaceViewer", "ViewFooter"], and all chunks
+    are registered if it is None. Without source maps, the .map files are not registered, as
+    for production.
+
+    The default can also be set by the environment variables
+    WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS, a comma separated list of component names,
+    and WEBVIZ_SUBSURFACE_COMPONENTS_SOURCE_MAPS=0. Unknown component names raise ValueError,
+    while in the environment variable they give a warning and all chunks.
+    """
+    # Updated in place, as the list is shared by the components
+    _js_dist[:] = _build_js_dist(components, source_maps)
+
+
+def _js_dist_from_environment():
+    """Get _js_dist as set by the environment variables, see register_async_chunks()
+
+    Unknown component names give a warning and all async chunks, instead of failing the import
+    of the package.
+    """
+    source_maps = _os.environ.get(
+        "WEBVIZ_SUBSURFACE_COMPONENTS_SOURCE_MAPS", "1"
+    ).lower() not in ("0", "false", "no")
+    if "WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS" not in _os.environ:
+        return _build_js_dist(None, source_maps)
+    components = [
+        component.strip()
+        for component in _os.environ[
+            "WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS"
+        ].split(",")
+        if component.strip()
     ]
-)
+    try:
+        return _build_js_dist(components, source_maps)
+    except ValueError as error:
+        warnings.warn(
+            f"WEBVIZ_SUBSURFACE_COMPONENTS_ASYNC_COMPONENTS: {error}. "
+            "Registering all async chunks."
+        )
+        return _build_js_dist(None, source_maps)
+
+
+_js_dist = _js_dist_from_environment()
+
+
+def enable_precompressed_bundles(app):
+    """Serve the bundles of the package precompressed, if prepared by precompress_bundles.py
+
+    See bundles.enable_precompressed_bundles()
+    """
+    _bundles.enable_precompressed_bundles(
+        app, package_name, _current_path, _bundle_manifest
+    )
+
+
+# Components are imported on first access, see __getattr__(). The namespace is registered for
+# Dash to serve _js_dist also before any component class is created.
+if "dash" in _sys.modules:
+    _check_dash()
+    # pylint: disable=wrong-import-position
+    from dash.development.base_component import ComponentRegistry as _ComponentRegistry
+
+    _ComponentRegistry.registry.add(__name__)
 
-for _component in __all__:
-    setattr(locals()[_component], "_js_dist", _js_dist)
+_this_module.__class__ = _LazyModule
+_bind_loaded()
@@ -0,0 +1,37 @@
+"""Allocation of ufunc results for Expression.evaluate_inplace(), reusing evaluated arrays"""
+
+import numpy as np
+
+
+def reusable_array(args, owned, released, where=None):
+    """Get array allocated by the evaluation, which can hold the ufunc result of args
+
+    Arrays owned by the operands are preferred, otherwise a released array is taken out of the
+    released list. Returns None if there is no array of the result shape and dtype.
+    """
+    if not owned and not released:
+        return None
+    if not all(isinstance(arg, (np.ndarray, np.generic, int, float)) for arg in args):
+        return None
+    dtype = np.result_type(*args)
+    if dtype.kind != "f":
+        return None
+    shape = (
+        np.broadcast(*args).shape if where is None else np.broadcast(*args, where).shape
+    )
+    for array in owned:
+        if array.dtype == dtype and array.shape == shape:
+            return array
+    for i, array in enumerate(released):
+        if array.dtype == dtype and array.shape == shape:
+            return released.pop(i)
+    return None
+
+
+def masked_array(args, where):
+    """Allocate NaN filled array for the ufunc result of args, evaluated where where is True"""
+    return np.full(
+        np.broadcast(*args, where).shape,
+        np.nan,
+        dtype=np.result_type(*args, np.float16),
+    )
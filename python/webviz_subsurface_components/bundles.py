@@ -0,0 +1,104 @@
+"""Registration and serving of precompressed, content hashed JavaScript bundles
+
+The bundles are prepared by precompress_bundles.py after the JavaScript build, which writes
+bundle-manifest.json to the package directory. The manifest maps the name of each bundle, as
+emitted by webpack, to the served file and its precompressed variants:
+
+    {
+        "webviz_subsurface_components.min.js": {
+            "path": "webviz_subsurface_components.0123456789abcdef.min.js",
+            "hash": "0123456789abcdef",
+            "encodings": {
+                "br": "webviz_subsurface_components.0123456789abcdef.min.js.br",
+                "gzip": "webviz_subsurface_components.0123456789abcdef.min.js.gz"
+            }
+        }
+    }
+"""
+
+import json
+import os
+
+MANIFEST_NAME = "bundle-manifest.json"
+
+# Encodings in order of preference, if accepted by the client
+ENCODINGS = ("br", "gzip")
+
+
+def read_bundle_manifest(directory):
+    """Get bundle manifest in directory, empty if the bundles are not precompressed"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def bundle_path(manifest, name):
+    """Get path of the served file of bundle, the name itself if not in the manifest"""
+    return manifest.get(name, {}).get("path", name)
+
+
+# pylint: disable=too-many-locals
+def enable_precompressed_bundles(app, namespace, directory, manifest):
+    """Serve the bundles of the manifest from their precompressed variants
+
+    Adds a request hook to the Flask server of the Dash app, which answers requests for the
+    bundles with the precompressed file for the best encoding accepted by the client, without
+    compressing on each request. Content hashed and Dash fingerprinted bundles are sent as
+    immutable. Other requests, and clients not accepting any of the encodings, are left to Dash.
+    """
+    # pylint: disable=import-outside-toplevel
+    import flask
+    from dash.fingerprint import check_fingerprint
+
+    files = {
+        entry["path"]: (entry["hash"], entry["encodings"], name != entry["path"])
+        for name, entry in manifest.items()
+    }
+    cache = {}
+
+    def read(filename):
+        data = cache.get(filename)
+        if data is None:
+            with open(os.path.join(directory, filename), "rb") as file:
+                data = file.read()
+            cache[filename] = data
+        return data
+
+    def serve_precompressed():
+        prefix = (
+            f"{app.config.routes_pathname_prefix}_dash-component-suites/{namespace}/"
+        )
+        if not flask.request.path.startswith(prefix):
+            return None
+        path, has_fingerprint = check_fingerprint(flask.request.path[len(prefix) :])
+        if path not in files:
+            return None
+        content_hash, encodings, is_hashed = files[path]
+        encoding = next(
+            (
+                encoding
+                for encoding in ENCODINGS
+                if encoding in encodings and flask.request.accept_encodings[encoding]
+            ),
+            None,
+        )
+        if encoding is None:
+            return None
+
+        headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+        if has_fingerprint or is_hashed:
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            headers["Cache-Control"] = "no-cache"
+            headers["ETag"] = f'"{content_hash}-{encoding}"'
+            if flask.request.if_none_match.contains(f"{content_hash}-{encoding}"):
+                return flask.Response(status=304, headers=headers)
+        return flask.Response(
+            read(encodings[encoding]),
+            mimetype="application/javascript",
+            headers=headers,
+        )
+
+    app.server.before_request(serve_precompressed)
@@ -0,0 +1,208 @@
+"""Compact variable values for Expression, arrays of mostly equal elements
+
+ConstantArray and SparseArray implement the numpy ufunc protocol, thus the numpy operators of
+Parser are applied to them without materializing the arrays where possible.
+"""
+
+import numpy as np
+
+
+def _broadcast_shape(*shapes):
+    """Get broadcast shape of shapes, without allocating arrays"""
+    return np.broadcast(*(np.broadcast_to(False, shape) for shape in shapes)).shape
+
+
+def _dense(value):
+    """Get array of ConstantArray or SparseArray, other values are returned unchanged"""
+    if isinstance(value, ConstantArray):
+        return value.broadcast()
+    if isinstance(value, SparseArray):
+        return value.toarray()
+    return value
+
+
+def _compact_ufunc(ufunc, method, inputs, kwargs):
+    """Apply ufunc to ConstantArray and SparseArray operands without materializing them
+
+    Element-wise calls where the other operands are numbers or compact arrays are evaluated on
+    the constant values and the stored elements. Other calls, e.g. with dense array operands or
+    the out argument, are done on materialized operands.
+    """
+    compact = all(
+        isinstance(value, (ConstantArray, SparseArray, np.generic, int, float))
+        or (isinstance(value, np.ndarray) and value.ndim == 0)
+        for value in inputs
+    )
+    if method != "__call__" or ufunc.nout != 1 or kwargs or not compact:
+        return getattr(ufunc, method)(*(_dense(value) for value in inputs), **kwargs)
+
+    shape = _broadcast_shape(*(np.shape(value) for value in inputs))
+    sparse = [value for value in inputs if isinstance(value, SparseArray)]
+    constants = [
+        value.value if isinstance(value, (ConstantArray, SparseArray)) else value
+        for value in inputs
+    ]
+    if not sparse:
+        return ConstantArray(ufunc(*constants), shape)
+    if any(value.shape != shape for value in sparse):
+        return ufunc(*(_dense(value) for value in inputs))
+
+    indices = sparse[0].indices
+    for value in sparse[1:]:
+        if value.indices is not indices:
+            indices = np.union1d(indices, value.indices)
+    data = ufunc(
+        *(
+            value.values_at(indices) if isinstance(value, SparseArray) else constant
+            for value, constant in zip(inputs, constants)
+        )
+    )
+    if len(indices) == 0:
+        return ConstantArray(ufunc(*constants), shape)
+    return SparseArray(indices, data, shape, ufunc(*constants))
+
+
+class ConstantArray(np.lib.mixins.NDArrayOperatorsMixin):
+    """Array with equal value for all elements, e.g. the rate of a shut-in well
+
+    Can be given as variable value to Expression. The operators of Expression keep the value
+    constant, thus the result is a ConstantArray without any elements allocated, if the other
+    operands are numbers or compact arrays. With a SparseArray operand the result is sparse.
+    Otherwise a read-only broadcast view of the value is used, which does not allocate memory
+    either. np.asarray() gives the full array.
+    """
+
+    def __init__(self, value, shape):
+        self.value = np.asarray(value)[()]
+        self.shape = np.broadcast_to(False, shape).shape
+
+    def __repr__(self):
+        return f"ConstantArray({self.value!r}, {self.shape})"
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def dtype(self):
+        return np.asarray(self.value).dtype
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def broadcast(self):
+        return np.broadcast_to(self.value, self.shape)
+
+    # pylint: disable=unused-argument
+    def __array__(self, dtype=None, copy=None):
+        return np.full(self.shape, self.value, dtype=dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        return _compact_ufunc(ufunc, method, inputs, kwargs)
+
+
+class SparseArray(np.lib.mixins.NDArrayOperatorsMixin):
+    """Array with the same value for most elements, e.g. a mostly zero injection rate
+
+    Only the elements differing from value are stored, as sorted flat indices and data. Can be
+    given as variable value to Expression. The operators of Expression are applied to the
+    stored elements and to value, if the other operands are numbers or compact arrays, where the
+    stored elements of sparse operands are merged. Otherwise the operand is materialized.
+    np.asarray() gives the full array.
+    """
+
+    def __init__(self, indices, data, shape, value=0.0):
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.data = np.asarray(data)
+        self.shape = np.broadcast_to(False, shape).shape
+        self.value = np.asarray(value, dtype=self.data.dtype)[()]
+
+    @staticmethod
+    def from_dense(array, value=0.0):
+        """Get sparse array storing the elements of array not equal to value"""
+        array = np.asarray(array)
+        flat = array.reshape(-1)
+        stored = ~np.isnan(flat) if np.isnan(value) else flat != value
+        indices = np.flatnonzero(stored)
+        return SparseArray(indices, flat[indices], array.shape, value)
+
+    def __repr__(self):
+        return (
+            f"SparseArray({len(self.indices)} stored elements, shape={self.shape}, "
+            f"value={self.value!r})"
+        )
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def values_at(self, indices):
+        """Get elements at sorted flat indices"""
+        if len(self.indices) == 0:
+            return np.full(len(indices), self.value, dtype=self.dtype)
+        positions = np.minimum(
+            np.searchsorted(self.indices, indices), len(self.indices) - 1
+        )
+        return np.where(
+            self.indices[positions] == indices, self.data[positions], self.value
+        )
+
+    def toarray(self):
+        array = np.full(self.size, self.value, dtype=self.dtype)
+        array[self.indices] = self.data
+        return array.reshape(self.shape)
+
+    # pylint: disable=unused-argument
+    def __array__(self, dtype=None, copy=None):
+        array = self.toarray()
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        return _compact_ufunc(ufunc, method, inputs, kwargs)
+
+
+def flatten(value, size):
+    """Get flattened array, ConstantArray or SparseArray of size, other values are unchanged"""
+    if isinstance(value, np.ndarray):
+        return value.reshape(-1)
+    if isinstance(value, ConstantArray):
+        return ConstantArray(value.value, (size,))
+    if isinstance(value, SparseArray):
+        return SparseArray(value.indices, value.data, (size,), value.value)
+    return value
+
+
+def slice_flat(value, start, length):
+    """Get length elements from start of flattened array, other values are unchanged
+
+    A ConstantArray chunk is the constant with the chunk shape, and a SparseArray chunk has the
+    stored elements in the chunk, with indices relative to start.
+    """
+    if isinstance(value, np.ndarray):
+        return value[start : start + length]
+    if isinstance(value, ConstantArray):
+        return ConstantArray(value.value, (length,))
+    if isinstance(value, SparseArray):
+        first, last = np.searchsorted(value.indices, [start, start + length])
+        return SparseArray(
+            value.indices[first:last] - start,
+            value.data[first:last],
+            (length,),
+            value.value,
+        )
+    return value
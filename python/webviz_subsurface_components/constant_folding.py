@@ -0,0 +1,49 @@
+"""Folding of constant operands and operator identities, see Expression.simplify()"""
+
+import numpy as np
+
+
+def fold(func, *constants):
+    """Evaluate operator for constant operands, returns None if not possible"""
+    if any(constant is None for constant in constants):
+        return None
+    try:
+        # Numpy scalars are kept, as their dtype takes part in the type promotion of the result
+        return func(*constants)
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+
+
+def _keeps_dtype(constant, floating):
+    """Check if an operation with constant keeps the dtype of a numeric operand
+
+    Numpy scalars take part in the type promotion, e.g. float32 times numpy int64 gives float64,
+    while Python numbers do not. Python floats convert integer operands to float.
+    """
+    if isinstance(constant, (np.generic, bool)):
+        return False
+    if isinstance(constant, float):
+        return floating
+    return isinstance(constant, int)
+
+
+def is_right_identity(operator, constant, floating):
+    """Check if a operator constant gives a, floating tells if a is floating point
+
+    Division by 1 is only an identity for floating point a, as it converts integers to float.
+    """
+    if not _keeps_dtype(constant, floating):
+        return False
+    if operator in ("+", "-"):
+        return constant == 0
+    if operator == "/":
+        return floating and constant == 1
+    return operator in ("*", "^", "**") and constant == 1
+
+
+def is_left_identity(operator, constant, floating):
+    if not _keeps_dtype(constant, floating):
+        return False
+    if operator == "+":
+        return constant == 0
+    return operator == "*" and constant == 1
@@ -0,0 +1,151 @@
+"""Fused element-wise evaluation of expressions compiled by numba, see evaluate_jit()
+
+numba is an optional dependency, imported on first use. Without numba, or for expressions and
+values numba can not compile, the expressions are evaluated with numpy.
+"""
+
+import threading
+import weakref
+from functools import lru_cache
+
+import numpy as np
+
+from .compact_arrays import ConstantArray, SparseArray
+from .py_expression_eval import TNUMBER, TOP1, TOP2, TVAR, ParserError
+
+# Minimum number of elements per array for evaluate_jit() to use numba, as smaller arrays do not
+# make up for the overhead of starting the parallel kernel
+JIT_MIN_SIZE = 100000
+
+# Kernels per expression and layout of the values, where None marks values numba failed to
+# compile or run the kernel for, such that later calls go directly to numpy
+_kernels = weakref.WeakKeyDictionary()
+_kernels_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _import_numba():
+    """Get the numba module, or None if numba is not installed"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        import numba
+    except ImportError:
+        return None
+    return numba
+
+
+def _expression_kernels(expression):
+    with _kernels_lock:
+        return _kernels.setdefault(expression, {})
+
+
+# pylint: disable=broad-except
+def evaluate_jit(expression, values, min_size=JIT_MIN_SIZE):
+    """Evaluate expression with a fused element-wise kernel compiled by numba
+
+    All operators are compiled into one loop over the elements, which is run in parallel across
+    cores, thus no intermediate arrays are allocated. A kernel is compiled and cached for each
+    combination of array and scalar variables and their dtypes.
+
+    Falls back to Expression.evaluate() if numba is not installed, a variable is a ConstantArray
+    or SparseArray, the array variables are smaller than min_size or differ in shape, or numba
+    can not compile the expression. Failing to compile is cached, such that later calls with
+    the same layout of values go directly to numpy. The result has the dtype of evaluate(), with
+    values equal to floating point rounding.
+    """
+    values = values or {}
+    variables = expression.variables()
+    if any(
+        name not in values or isinstance(values[name], (ConstantArray, SparseArray))
+        for name in variables
+    ):
+        return expression.evaluate(values)
+    numba = _import_numba()
+    if numba is None:
+        return expression.evaluate(values)
+    is_array = tuple(isinstance(values[name], np.ndarray) for name in variables)
+    arrays = [
+        values[name] for name in variables if isinstance(values[name], np.ndarray)
+    ]
+    if (
+        not arrays
+        or arrays[0].size < min_size
+        or any(array.shape != arrays[0].shape for array in arrays)
+    ):
+        return expression.evaluate(values)
+
+    kernels = _expression_kernels(expression)
+    key = (is_array, tuple(np.asarray(values[name]).dtype for name in variables))
+    kernel = kernels.get(key, False)
+    if kernel is None:
+        return expression.evaluate(values)
+    try:
+        if kernel is False:
+            kernel = _kernel(numba, expression, is_array)
+        with np.errstate(all="ignore"):
+            first = expression.evaluate(
+                {
+                    name: value.reshape(-1)[:1]
+                    if isinstance(value, np.ndarray)
+                    else value
+                    for name, value in values.items()
+                }
+            )
+        out = np.empty(arrays[0].size, dtype=np.result_type(first))
+        kernel(
+            out,
+            *(
+                np.ravel(values[name]) if array else values[name]
+                for name, array in zip(variables, is_array)
+            ),
+        )
+    except Exception:
+        kernels[key] = None
+        return expression.evaluate(values)
+    kernels[key] = kernel
+    return out.reshape(arrays[0].shape)
+
+
+def _kernel(numba, expression, is_array):
+    """Get numba kernel writing the expression for each element into the first argument"""
+    variables = {name: f"x{i}" for i, name in enumerate(expression.variables())}
+    namespace = {"prange": numba.prange}
+    lines = [
+        f"def _kernel(out, {', '.join(f'v{i}' for i in range(len(variables)))}):",
+        "    for i in prange(out.shape[0]):",
+    ]
+    lines += [
+        f"        x{i} = v{i}[i]" if array else f"        x{i} = v{i}"
+        for i, array in enumerate(is_array)
+    ]
+
+    def bind(obj):
+        name = f"_k{len(namespace)}"
+        namespace[name] = obj
+        return name
+
+    nstack = []
+    for i, item in enumerate(expression.tokens):
+        if item.type_ == TNUMBER and not isinstance(item.number_, list):
+            nstack.append(bind(item.number_))
+            continue
+        if item.type_ == TVAR:
+            nstack.append(variables[item.index_])
+            continue
+        if item.type_ == TOP2:
+            n_2 = nstack.pop()
+            n_1 = nstack.pop()
+            call = f"{bind(expression.ops2[item.index_])}({n_1}, {n_2})"
+        elif item.type_ == TOP1:
+            call = f"{bind(expression.ops1[item.index_])}({nstack.pop()})"
+        else:
+            raise ParserError("function calls are not supported by evaluate_jit()")
+        lines.append(f"        t{i} = {call}")
+        nstack.append(f"t{i}")
+    if len(nstack) != 1:
+        raise ParserError("invalid Expression (parity)")
+    lines.append(f"        out[i] = {nstack[0]}")
+
+    # Generated source only contains identifiers
+    exec("\n".join(lines), namespace)  # nosec B102 pylint: disable=exec-used
+    return numba.njit(parallel=True, error_model="numpy")(namespace["_kernel"])
@@ -0,0 +1,85 @@
+"""Per token profiling of expression evaluation, see Expression.evaluate_profiled()"""
+
+import json
+import threading
+
+import numpy as np
+
+from .py_expression_eval import TNUMBER, TOP1, TOP2, TVAR
+
+
+class ExpressionProfiler:
+    """Aggregate per token measurements of Expression.evaluate_profiled()
+
+    Measurements are aggregated per token position and operation across calls, thus a profiler
+    is typically used for one expression. With count_nans, the number of NaN values in the
+    result of each token is counted as well, e.g. to find divisions giving NaN. The profiler can
+    be shared between threads.
+    """
+
+    def __init__(self, count_nans=False):
+        self.count_nans = count_nans
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @staticmethod
+    def operation(item):
+        """Get description of token"""
+        if item.type_ == TNUMBER:
+            return f"number {item.number_}"
+        if item.type_ == TVAR:
+            return f"variable {item.index_}"
+        if item.type_ == TOP1:
+            return f"unary {item.index_}"
+        if item.type_ == TOP2:
+            return f"binary {item.index_}"
+        return "call"
+
+    def record(self, position, item, result, seconds, allocated):
+        """Add measurement of token at position in the token list"""
+        key = (position, ExpressionProfiler.operation(item))
+        dtype = (
+            result.dtype
+            if isinstance(result, (np.ndarray, np.generic))
+            else np.dtype(type(result))
+        )
+        nans = (
+            int(np.count_nonzero(np.isnan(result)))
+            if self.count_nans and dtype.kind in "fc"
+            else 0
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"calls": 0, "seconds": 0.0, "bytes": 0, "nans": 0}
+                self._entries[key] = entry
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += allocated
+            entry["nans"] += nans
+            entry["shape"] = list(np.shape(result))
+            entry["dtype"] = str(dtype)
+
+    def report(self):
+        """Get list of aggregated measurements per token, slowest token first
+
+        Each item has the token position and operation, the number of calls, the total seconds
+        and allocated bytes, the number of NaN values if counted, and the shape and dtype of the
+        last result.
+        """
+        with self._lock:
+            report = [
+                {"token": position, "operation": operation, **entry}
+                for (position, operation), entry in self._entries.items()
+            ]
+        if not self.count_nans:
+            for entry in report:
+                del entry["nans"]
+        return sorted(report, key=lambda entry: entry["seconds"], reverse=True)
+
+    def to_json(self, indent=None):
+        return json.dumps(self.report(), indent=indent)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
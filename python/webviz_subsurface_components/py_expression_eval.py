@@ -35,20 +35,93 @@ https://github.com/silentmatt/js-expression-eval
 """
 
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
+from .array_buffers import masked_array, reusable_array
+from .compact_arrays import ConstantArray, SparseArray, flatten, slice_flat
+from .constant_folding import fold, is_left_identity, is_right_identity
+
 TNUMBER = 0
 TOP1 = 1
 TOP2 = 2
 TVAR = 3
 TFUNCALL = 4
 
+# Number of elements per chunk in Expression.evaluate_chunked(), such that the chunks of a few
+# float64 inputs and intermediate results fit in L2 cache
+DEFAULT_CHUNK_SIZE = 16384
+
+# Values used for all chunks by Expression.evaluate_stream(), other values are iterated
+_STREAM_CONSTANTS = (
+    ConstantArray,
+    SparseArray,
+    np.ndarray,
+    np.generic,
+    int,
+    float,
+    str,
+    bytes,
+)
+
+# Functions of Parser.ops1 giving floating point results also for integer arguments
+_FLOATING_OPS1 = ("sqrt", "ln", "log10")
+
+# Policies for the dtype of numbers in Expression, see Parser
+DTYPE_POLICIES = (None, "preserve", "float32", "float64")
+
 
 class ParserError(Exception):
     pass
 
 
+def _call_function(func, args):
+    if callable(func):
+        if isinstance(args, list):
+            return func(*args)
+        return func(args)
+    raise ParserError(f"{func} is not a function")
+
+
+def _constant_entry(value):
+    """Get entry of Expression.simplify() for a folded constant"""
+    return (
+        [Token(TNUMBER, 0, 0, value)],
+        value,
+        np.asarray(value).dtype.kind == "f",
+        None,
+    )
+
+
+def _cast(value, dtype):
+    """Cast array or number to dtype, arrays are only copied if the dtype differs"""
+    if isinstance(value, np.ndarray):
+        return value.astype(dtype, copy=False)
+    if isinstance(value, (int, float, np.generic)):
+        return dtype.type(value)
+    return value
+
+
+def _policy_dtype(policy, values):
+    """Get dtype for numbers given the dtype policy and the variable values
+
+    For "preserve" this is the floating point dtype of the values, or None if there are no
+    floating point values.
+    """
+    if policy is None:
+        return None
+    if policy != "preserve":
+        return np.dtype(policy)
+    floating = [
+        value.dtype
+        for value in values.values()
+        if isinstance(value, (np.ndarray, np.generic)) and value.dtype.kind == "f"
+    ]
+    return np.result_type(*floating) if floating else None
+
+
 # pylint: disable=too-few-public-methods
 class Token:
     def __init__(self, type_, index_, prio_, number_):
@@ -67,19 +140,22 @@ class Token:
         return "Invalid Token"
 
 
+# pylint: disable=too-many-instance-attributes
 class Expression:
     """
     Expression based on Expression in py_expression_eval, modifications are done.
 
     `Adjustments:`
-    Removed unused functionality as simplify, substitute and toString conversion.
+    Removed unused functionality as substitute and toString conversion.
 
     Removed possibility to assign functions to variables during evaluate(). Thereby variables
     function is simplified as well.
 
+    Variable values can be ConstantArray or SparseArray, which are kept compact through the
+    operators where possible, see compact_arrays.
+
     `Removed functions:`
 
-    - simplify()
     - substitute()
     - toString()
     - symbols()
@@ -87,18 +163,64 @@ class Expression:
     `Adjusted functions:`
 
     - variables() - As functions does not exist, previous symbols function is equal variables
+    - simplify() - Values can not be substituted, and identity operations are removed
+
+    `Added functions:`
+
+    - compile() - Generate a Python function equal to evaluate(), without per token dispatch
+    - evaluate_inplace() - Evaluate reusing intermediate arrays, optionally into given output
+    - evaluate_chunked() - Evaluate large arrays chunk by chunk, optionally in a thread pool
+    - evaluate_jit() - Evaluate with a fused parallel kernel compiled by numba, if installed
+    - evaluate_stream() - Evaluate iterables of aligned chunks, yielding result chunks lazily
+    - evaluate_profiled() - Evaluate as evaluate(), recording time and memory per token
+    - with_dtype() - Get the expression with another dtype policy, see Parser
     """
 
-    def __init__(self, tokens, ops1, ops2):
+    def __init__(self, tokens, ops1, ops2, dtype=None):
+        if dtype not in DTYPE_POLICIES:
+            raise ValueError(f"dtype must be one of {DTYPE_POLICIES}, got {dtype!r}")
         self.tokens = tokens
         self.ops1 = ops1
         self.ops2 = ops2
+        self.dtype = dtype
+        self.removed_operations = 0
+        self._compiled = {}
+        self._typed_tokens = {}
+
+    def with_dtype(self, dtype):
+        """Get expression sharing the tokens of this expression, with the given dtype policy"""
+        if dtype == self.dtype:
+            return self
+        expression = Expression(self.tokens, self.ops1, self.ops2, dtype)
+        expression.removed_operations = self.removed_operations
+        return expression
+
+    def _typed(self, values):
+        """Get values and tokens with numbers cast according to the dtype policy
+
+        Returns the values, the tokens and the dtype, which is None if nothing is cast.
+        """
+        dtype = _policy_dtype(self.dtype, values)
+        if dtype is None:
+            return values, self.tokens, None
+        if self.dtype != "preserve":
+            values = {name: _cast(value, dtype) for name, value in values.items()}
+        tokens = self._typed_tokens.get(dtype)
+        if tokens is None:
+            tokens = [
+                Token(TNUMBER, 0, 0, _cast(item.number_, dtype))
+                if item.type_ == TNUMBER
+                else item
+                for item in self.tokens
+            ]
+            self._typed_tokens[dtype] = tokens
+        return values, tokens, dtype
 
     # pylint: disable=too-many-branches
     def evaluate(self, values):
-        values = values or {}
+        values, tokens, _ = self._typed(values or {})
         nstack = []
-        for item in self.tokens:
+        for item in tokens:
             type_ = item.type_
             if type_ == TNUMBER:
                 nstack.append(item.number_)
@@ -119,19 +241,421 @@ class Expression:
             elif type_ == TFUNCALL:
                 n_1 = nstack.pop()
                 func = nstack.pop()
-                if callable(func):
-                    if isinstance(n_1, list):
-                        nstack.append(func(*n_1))
-                    else:
-                        nstack.append(func(n_1))
-                else:
-                    raise ParserError(f"{func} is not a function")
+                nstack.append(_call_function(func, n_1))
+            else:
+                raise ParserError("invalid Expression")
+        if len(nstack) > 1:
+            raise ParserError("invalid Expression (parity)")
+        return nstack[0]
+
+    def evaluate_profiled(self, values, profiler):
+        """Evaluate expression as evaluate(), recording each token in an ExpressionProfiler
+
+        The wall time, allocated bytes, shape and dtype of the result of each token are recorded
+        by the profiler, see expression_profiler. evaluate() itself is not instrumented, thus
+        profiling has no cost when not used.
+        """
+        values, tokens, _ = self._typed(values or {})
+        nstack = []
+        for i, item in enumerate(tokens):
+            type_ = item.type_
+            start = time.perf_counter()
+            operands = []
+            if type_ == TNUMBER:
+                nstack.append(item.number_)
+            elif type_ == TVAR:
+                if item.index_ not in values:
+                    raise ParserError(f"undefined variable: {item.index_}")
+                nstack.append(values[item.index_])
+            elif type_ == TOP2:
+                n_2 = nstack.pop()
+                operands = [nstack.pop(), n_2]
+                nstack.append(self.ops2[item.index_](*operands))
+            elif type_ == TOP1:
+                operands = [nstack.pop()]
+                nstack.append(self.ops1[item.index_](*operands))
+            elif type_ == TFUNCALL:
+                n_1 = nstack.pop()
+                operands = [nstack.pop(), n_1]
+                nstack.append(_call_function(*operands))
             else:
                 raise ParserError("invalid Expression")
+            seconds = time.perf_counter() - start
+            result = nstack[-1]
+            allocated = (
+                result.nbytes
+                if isinstance(result, np.ndarray)
+                and type_ not in (TNUMBER, TVAR)
+                and not any(result is operand for operand in operands)
+                else 0
+            )
+            profiler.record(i, item, result, seconds, allocated)
         if len(nstack) > 1:
             raise ParserError("invalid Expression (parity)")
         return nstack[0]
 
+    # pylint: disable=too-many-locals
+    def evaluate_inplace(self, values, out=None, where=None):
+        """Evaluate expression reusing intermediate arrays
+
+        Gives the same result as evaluate(), but intermediate results of the operators are
+        written into arrays allocated by earlier operators using the out argument of the numpy
+        ufuncs. Arrays released from the stack are kept for reuse, thus the number of allocated
+        arrays is bounded by the stack depth rather than the number of tokens. Input arrays are
+        never written to. Only floating point arrays are reused, as the ufuncs then give results
+        of the input dtype.
+
+        If out is given, the result of the last operator is written into out, which is returned.
+
+        If where is given, it is passed to the ufuncs to only evaluate elements where it is True,
+        without copying the inputs. Elements where it is False are NaN in the result, and are
+        left unchanged in out. As NaN requires floating point, integer results are converted.
+        """
+        values, tokens, _ = self._typed(values or {})
+        ufunc_kwargs = {} if where is None else {"where": where}
+        nstack = []  # Pairs of value and flag for arrays allocated by the evaluation
+        released = []
+        last = len(tokens) - 1
+        for i, item in enumerate(tokens):
+            type_ = item.type_
+            if type_ == TNUMBER:
+                nstack.append((item.number_, False))
+            elif type_ == TVAR:
+                if item.index_ in values:
+                    nstack.append((values[item.index_], False))
+                else:
+                    raise ParserError(f"undefined variable: {item.index_}")
+            elif type_ in (TOP1, TOP2):
+                if type_ == TOP2:
+                    n_2 = nstack.pop()
+                    operands = [nstack.pop(), n_2]
+                    func = self.ops2[item.index_]
+                else:
+                    operands = [nstack.pop()]
+                    func = self.ops1[item.index_]
+                args = [value for value, _ in operands]
+                if out is not None and i == last:
+                    target = out
+                else:
+                    target = reusable_array(
+                        args,
+                        [value for value, owned in operands if owned],
+                        released,
+                        where,
+                    )
+                if target is None and where is not None:
+                    target = masked_array(args, where)
+                if target is None:
+                    result = func(*args)
+                else:
+                    result = func(*args, out=target, **ufunc_kwargs)
+                released += [
+                    value for value, owned in operands if owned and value is not target
+                ]
+                nstack.append((result, isinstance(result, np.ndarray)))
+            elif type_ == TFUNCALL:
+                n_1, _ = nstack.pop()
+                func, _ = nstack.pop()
+                nstack.append((_call_function(func, n_1), False))
+            else:
+                raise ParserError("invalid Expression")
+        if len(nstack) > 1:
+            raise ParserError("invalid Expression (parity)")
+        result, owned = nstack[0]
+        if out is not None and result is not out:
+            np.copyto(out, result, **ufunc_kwargs)
+            return out
+        if where is not None and not owned:
+            masked = masked_array([result], where)
+            np.copyto(masked, result, where=where)
+            return masked
+        return result
+
+    def evaluate_chunked(
+        self, values, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None, out=None
+    ):
+        """Evaluate expression over chunks of the input arrays
+
+        The whole token list is evaluated for one chunk of the flattened inputs at a time, such
+        that the intermediate results are kept in cache instead of streaming full arrays through
+        memory for each operator. Each chunk is evaluated with evaluate_inplace() into a slice
+        of the result array. With max_workers the chunks are split into contiguous ranges, each
+        evaluated by one thread of a thread pool.
+
+        Chunking requires all array variables and out to be C-contiguous with equal shape,
+        otherwise, or for inputs smaller than two chunks, the expression is evaluated with
+        evaluate_inplace(). ConstantArray and SparseArray variables of the same shape are
+        sliced into compact chunks. The result is equal to evaluate().
+        """
+        values = values or {}
+        arrays = [
+            values[name]
+            for name in self.variables()
+            if isinstance(values.get(name), np.ndarray)
+        ]
+        compact = [
+            values[name]
+            for name in self.variables()
+            if isinstance(values.get(name), (ConstantArray, SparseArray))
+        ]
+        if (
+            not arrays
+            or arrays[0].size < 2 * chunk_size
+            or any(array.shape != arrays[0].shape for array in arrays + compact)
+            or not all(array.flags.c_contiguous for array in arrays)
+        ):
+            return self.evaluate_inplace(values, out=out)
+        if out is not None and not out.flags.c_contiguous:
+            return self.evaluate_inplace(values, out=out)
+
+        shape = arrays[0].shape
+        size = arrays[0].size
+        flat_values = {name: flatten(value, size) for name, value in values.items()}
+
+        def chunk_values(start):
+            return {
+                name: slice_flat(value, start, min(chunk_size, size - start))
+                for name, value in flat_values.items()
+            }
+
+        # The first chunk gives the result dtype
+        first = self.evaluate_inplace(chunk_values(0))
+        if np.shape(first) != (chunk_size,):
+            return self.evaluate_inplace(values, out=out)
+        if out is None:
+            out = np.empty(shape, dtype=first.dtype)
+        flat_out = out.reshape(-1)
+        flat_out[:chunk_size] = first
+
+        def evaluate_chunk(start):
+            self.evaluate_inplace(
+                chunk_values(start), out=flat_out[start : start + chunk_size]
+            )
+
+        def evaluate_chunks(starts):
+            for start in starts:
+                evaluate_chunk(start)
+
+        starts = range(chunk_size, size, chunk_size)
+        if max_workers is None or max_workers <= 1:
+            evaluate_chunks(starts)
+        else:
+            # Each worker evaluates a contiguous range of chunks, as a task per chunk costs more
+            # than the evaluation of the chunk
+            step = -(-len(starts) // max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(
+                    executor.map(
+                        evaluate_chunks,
+                        [starts[i : i + step] for i in range(0, len(starts), step)],
+                    )
+                )
+        return out
+
+    def evaluate_stream(self, chunks):
+        """Evaluate expression for iterables of aligned chunks per variable
+
+        Each value in chunks is either an iterable of chunks, e.g. one array per realization or
+        per date window, or a number or array used for all chunks. The iterables are consumed in
+        step, and the result for each step is yielded before the next chunks are read, thus only
+        one chunk per variable is held at a time. Raises ValueError if the iterables do not have
+        equal length.
+        """
+        chunks = chunks or {}
+        constants = {}
+        streams = {}
+        for name, value in chunks.items():
+            if isinstance(value, _STREAM_CONSTANTS):
+                constants[name] = value
+            else:
+                streams[name] = iter(value)
+        evaluate = self.compile()
+        if not streams:
+            yield evaluate(constants)
+            return
+
+        exhausted = object()
+        while True:
+            step = {name: next(stream, exhausted) for name, stream in streams.items()}
+            ended = [name for name, value in step.items() if value is exhausted]
+            if ended:
+                if len(ended) != len(step):
+                    raise ValueError(
+                        f"Chunk iterables of {ended} ended before the chunk iterables of "
+                        f"{sorted(set(step) - set(ended))}"
+                    )
+                return
+            yield evaluate({**constants, **step})
+
+    def evaluate_jit(self, values, min_size=None):
+        """Evaluate expression with a fused kernel compiled by numba, if installed
+
+        See expression_jit.evaluate_jit(), min_size defaults to expression_jit.JIT_MIN_SIZE.
+        """
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from .expression_jit import JIT_MIN_SIZE, evaluate_jit
+
+        return evaluate_jit(
+            self, values, JIT_MIN_SIZE if min_size is None else min_size
+        )
+
+    def compile(self):
+        """Compile the token list into a Python function
+
+        The returned function takes the values dict and gives the same result as evaluate(), but
+        the dispatch on token type and the operator lookups are done once at compile time. Every
+        token is generated as one statement, thus long expressions do not give deep nesting.
+
+        Token lists not giving a valid stack program are not compiled, and evaluate() is returned
+        to raise the corresponding error.
+
+        With a dtype policy, a function is compiled for each dtype of the numbers on first use.
+        """
+        if self.dtype is None:
+            return self._compile_tokens(None, self.tokens)
+
+        def _typed_expression(values):
+            values, tokens, dtype = self._typed(values or {})
+            return self._compile_tokens(dtype, tokens)(values)
+
+        return _typed_expression
+
+    def _compile_tokens(self, dtype, tokens):
+        """Compile token list with numbers of dtype into a Python function, see compile()"""
+        compiled = self._compiled.get(dtype)
+        if compiled is not None:
+            return compiled
+
+        namespace = {"ParserError": ParserError, "_call_function": _call_function}
+        lines = ["def _expression(values):", "    values = values or {}"]
+        variables = {}
+        nstack = []
+
+        def bind(obj):
+            name = f"_k{len(namespace)}"
+            namespace[name] = obj
+            return name
+
+        try:
+            for i, item in enumerate(tokens):
+                type_ = item.type_
+                if type_ == TNUMBER:
+                    nstack.append(bind(item.number_))
+                    continue
+                if type_ == TVAR:
+                    if item.index_ not in variables:
+                        variables[item.index_] = f"_v{len(variables)}"
+                        lines += [
+                            f"    if {item.index_!r} not in values:",
+                            f"        raise ParserError({f'undefined variable: {item.index_}'!r})",
+                            f"    {variables[item.index_]} = values[{item.index_!r}]",
+                        ]
+                    nstack.append(variables[item.index_])
+                    continue
+                if type_ == TOP2:
+                    n_2 = nstack.pop()
+                    n_1 = nstack.pop()
+                    call = f"{bind(self.ops2[item.index_])}({n_1}, {n_2})"
+                elif type_ == TOP1:
+                    n_1 = nstack.pop()
+                    call = f"{bind(self.ops1[item.index_])}({n_1})"
+                elif type_ == TFUNCALL:
+                    n_1 = nstack.pop()
+                    func = nstack.pop()
+                    call = f"_call_function({func}, {n_1})"
+                else:
+                    return self.evaluate
+                lines.append(f"    _t{i} = {call}")
+                nstack.append(f"_t{i}")
+        except IndexError:
+            return self.evaluate
+        if len(nstack) != 1:
+            return self.evaluate
+        lines.append(f"    return {nstack[0]}")
+
+        # Generated source only contains identifiers and repr() of variable names
+        exec("\n".join(lines), namespace)  # nosec B102 pylint: disable=exec-used
+        self._compiled[dtype] = namespace["_expression"]
+        return self._compiled[dtype]
+
+    # pylint: disable=too-many-branches, too-many-locals
+    def simplify(self):
+        """Get expression with constant subexpressions folded and identity operations removed
+
+        Operators with only constant operands are evaluated into a single number, and the
+        operations a*1, 1*a, a+0, 0+a, a-0, a^1 and a**1 are replaced by a. a/1 and operations
+        with floats as a*1.0 are only replaced if a is known to be floating point, e.g. a result
+        of / or sqrt, and operations with folded constants, which are numpy scalars, are kept.
+        The number of removed operations is given by removed_operations of the returned
+        expression.
+
+        The simplified expression gives results of the same values and dtype as evaluate() for
+        numeric variable values. An expression is never reduced to a bare variable, e.g. a*1 is
+        kept, such that the result is not the variable value itself. Token lists not giving a
+        valid stack program are returned unchanged.
+        """
+        # Tuples of token list, constant value or None for non-constants, flag for floating
+        # point results, and the identity operation removed if the token list is a variable
+        nstack = []
+        removed_operations = 0
+        try:
+            for item in self.tokens:
+                type_ = item.type_
+                if type_ == TNUMBER:
+                    constant = None if isinstance(item.number_, list) else item.number_
+                    floating = np.asarray(item.number_).dtype.kind == "f"
+                    nstack.append(([item], constant, floating, None))
+                elif type_ == TVAR:
+                    nstack.append(([item], None, False, None))
+                elif type_ == TOP1:
+                    tokens, constant, floating, _ = nstack.pop()
+                    folded = fold(self.ops1[item.index_], constant)
+                    if folded is None:
+                        floating = floating or item.index_ in _FLOATING_OPS1
+                        nstack.append((tokens + [item], None, floating, None))
+                    else:
+                        nstack.append(_constant_entry(folded))
+                        removed_operations += 1
+                elif type_ == TOP2:
+                    tokens_2, constant_2, floating_2, _ = nstack.pop()
+                    tokens_1, constant_1, floating_1, _ = nstack.pop()
+                    operation = tokens_1 + tokens_2 + [item]
+                    folded = fold(self.ops2[item.index_], constant_1, constant_2)
+                    if folded is not None:
+                        nstack.append(_constant_entry(folded))
+                        removed_operations += 1
+                    elif constant_2 is not None and is_right_identity(
+                        item.index_, constant_2, floating_1
+                    ):
+                        nstack.append((tokens_1, None, floating_1, operation))
+                        removed_operations += 1
+                    elif constant_1 is not None and is_left_identity(
+                        item.index_, constant_1, floating_2
+                    ):
+                        nstack.append((tokens_2, None, floating_2, operation))
+                        removed_operations += 1
+                    else:
+                        floating = floating_1 or floating_2 or item.index_ == "/"
+                        nstack.append((operation, None, floating, None))
+                else:
+                    tokens_2, _, _, _ = nstack.pop()
+                    tokens_1, _, _, _ = nstack.pop()
+                    nstack.append((tokens_1 + tokens_2 + [item], None, False, None))
+        except IndexError:
+            # Token list is not a valid stack program, evaluate() raises the error
+            return self
+        if len(nstack) != 1:
+            return self
+
+        tokens, _, _, identity = nstack[0]
+        if len(tokens) == 1 and tokens[0].type_ == TVAR and identity is not None:
+            # Keep the last identity operation, as the result would be the variable value
+            tokens = identity
+            removed_operations -= 1
+        simplified = Expression(tokens, self.ops1, self.ops2, self.dtype)
+        simplified.removed_operations = removed_operations
+        return simplified
+
     def variables(self):
         variables = []
         for item in self.tokens:
@@ -140,7 +664,51 @@ class Expression:
         return variables
 
 
-# pylint: disable= too-many-instance-attributes
+# Binary operators with (priority, ops2 key), where bullet operators are multiplication
+OPERATORS = {
+    "**": (8, "**"),
+    "^": (8, "^"),
+    "%": (6, "%"),
+    "/": (6, "/"),
+    "\u2219": (5, "*"),  # bullet operator
+    "\u2022": (5, "*"),  # black small circle
+    "*": (5, "*"),
+    "+": (4, "+"),
+    "-": (4, "-"),
+}
+
+# Token pattern for Parser.tokenize(). The alternatives are ordered by precedence, and a name
+# is a letter or "_" followed by letters, "_", digits or ".", cut at letters without case by
+# _name_length().
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<operator>\*\*|[\^%/\u2219\u2022*+\-])
+    |(?P<scientific>(?:[0-9]+\.?[0-9]*|\.[0-9]+)[eE][-+]?[0-9]+)
+    |(?P<decimal>[0-9.]+)
+    |(?P<lparen>\()
+    |(?P<rparen>\))
+    |(?P<name>[^\W\d](?:[^\W\d]|[0-9.])*)
+    |(?P<white>\s+)
+    |(?P<unknown>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def _name_length(text):
+    """Get length of the name at the start of text matched by the name group of _TOKEN_PATTERN
+
+    Names only consist of letters with case, "_", "." and digits, thus the name ends at the first
+    letter without case, e.g. CJK, which is an unknown character.
+    """
+    if text.isascii():
+        return len(text)
+    for i, char in enumerate(text):
+        if char.lower() == char.upper() and char not in "_." and not "0" <= char <= "9":
+            return i
+    return len(text)
+
+
 class Parser:
     """
     Expression parser based on py_expression_eval, modifications are done.
@@ -170,6 +738,21 @@ class Parser:
     - functions moved into ops2 as members of self.functions are handled as variables
     and will be assigned during evaluate()
 
+    The character-by-character scanning with isOperator(), isNumber(), isConst(), isOp1(),
+    isOp2(), isVar() and isWhite() is replaced by tokenize(), which splits the expression in a
+    single pass using one precompiled pattern. The produced tokens and error columns are equal
+    to the scanner, except that invalid numbers as "1.2.3" raise ParserError.
+
+    All scan state is kept in local variables of tokenize() and parse(), thus a single Parser
+    instance can be shared between threads.
+
+    `Added arguments:`
+
+    - dtype - Policy for the dtype of numbers and constants in parsed expressions. With None
+    they are Python numbers. With "preserve" they are cast to the floating point dtype of the
+    variable values, thus float32 vectors give float32 results. With "float32" or "float64"
+    the variable values are cast to the dtype as well.
+
     """
 
     PRIMARY = 1
@@ -181,19 +764,11 @@ class Parser:
     CALL = 64
     NULLARY_CALL = 128
 
-    def __init__(self, string_literal_quotes=("'", '"')):
+    def __init__(self, string_literal_quotes=("'", '"'), dtype=None):
+        if dtype not in DTYPE_POLICIES:
+            raise ValueError(f"dtype must be one of {DTYPE_POLICIES}, got {dtype!r}")
         self.string_literal_quotes = string_literal_quotes
-
-        self.success = False
-        self.errormsg = ""
-        self.expression = ""
-
-        self.pos = 0
-
-        self.tokennumber = 0
-        self.tokenprio = 0
-        self.tokenindex = 0
-        self.tmpprio = 0
+        self.dtype = dtype
 
         # Note: All functions should be in self.ops1 as items are handled as functions
         self.ops1 = {
@@ -221,45 +796,38 @@ class Parser:
 
     # pylint: disable = too-many-branches, too-many-statements
     def parse(self, expr):
-        self.errormsg = ""
-        self.success = True
         operstack = []
         tokenstack = []
-        self.tmpprio = 0
         expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
         noperators = 0
-        self.expression = expr
-        self.pos = 0
-
-        while self.pos < len(self.expression):
-            if self.is_operator():
-                if self.is_sign() and expected & self.SIGN:
-                    if self.is_negative_sign():
-                        self.tokenprio = 5
-                        self.tokenindex = "-"
+        tmpprio = 0
+
+        for kind, value, prio, pos in self.tokenize(expr):
+            if kind == "operator":
+                if value in ("+", "-") and expected & self.SIGN:
+                    if value == "-":
                         noperators += 1
-                        self.addfunc(tokenstack, operstack, TOP1)
+                        self.addfunc(tokenstack, operstack, TOP1, "-", 5 + tmpprio)
                     expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
                 else:
                     if expected and self.OPERATOR == 0:
-                        self.error_parsing(self.pos, "unexpected operator")
+                        self.error_parsing(expr, pos, "unexpected operator")
                     noperators += 2
-                    self.addfunc(tokenstack, operstack, TOP2)
+                    self.addfunc(tokenstack, operstack, TOP2, value, prio + tmpprio)
                     expected = self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
-            elif self.is_number():
+            elif kind == "number":
                 if expected and self.PRIMARY == 0:
-                    self.error_parsing(self.pos, "unexpected number")
-                token = Token(TNUMBER, 0, 0, self.tokennumber)
+                    self.error_parsing(expr, pos, "unexpected number")
+                token = Token(TNUMBER, 0, 0, value)
                 tokenstack.append(token)
                 expected = self.OPERATOR | self.RPAREN
-            elif self.is_left_parenth():
+            elif kind == "lparen":
+                tmpprio += 10
                 if (expected & self.LPAREN) == 0:
-                    self.error_parsing(self.pos, 'unexpected "("')
+                    self.error_parsing(expr, pos, 'unexpected "("')
                 if expected & self.CALL:
                     noperators += 2
-                    self.tokenprio = -2
-                    self.tokenindex = -1
-                    self.addfunc(tokenstack, operstack, TFUNCALL)
+                    self.addfunc(tokenstack, operstack, TFUNCALL, -1, -2 + tmpprio)
                 expected = (
                     self.PRIMARY
                     | self.LPAREN
@@ -267,71 +835,60 @@ class Parser:
                     | self.SIGN
                     | self.NULLARY_CALL
                 )
-            elif self.is_right_parenth():
+            elif kind == "rparen":
+                tmpprio -= 10
                 if expected & self.NULLARY_CALL:
                     token = Token(TNUMBER, 0, 0, [])
                     tokenstack.append(token)
                 elif (expected & self.RPAREN) == 0:
-                    self.error_parsing(self.pos, 'unexpected ")"')
+                    self.error_parsing(expr, pos, 'unexpected ")"')
                 expected = self.OPERATOR | self.RPAREN | self.LPAREN | self.CALL
-            elif self.is_const():
+            elif kind == "const":
                 if (expected & self.PRIMARY) == 0:
-                    self.error_parsing(self.pos, "unexpected constant")
-                consttoken = Token(TNUMBER, 0, 0, self.tokennumber)
+                    self.error_parsing(expr, pos, "unexpected constant")
+                consttoken = Token(TNUMBER, 0, 0, value)
                 tokenstack.append(consttoken)
                 expected = self.OPERATOR | self.RPAREN
-            elif self.is_op2():
+            elif kind == "op2":
                 if (expected & self.FUNCTION) == 0:
-                    self.error_parsing(self.pos, "unexpected function")
-                self.addfunc(tokenstack, operstack, TOP2)
+                    self.error_parsing(expr, pos, "unexpected function")
+                self.addfunc(tokenstack, operstack, TOP2, value, prio + tmpprio)
                 noperators += 2
                 expected = self.LPAREN
-            elif self.is_op1():
+            elif kind == "op1":
                 if (expected & self.FUNCTION) == 0:
-                    self.error_parsing(self.pos, "unexpected function")
-                self.addfunc(tokenstack, operstack, TOP1)
+                    self.error_parsing(expr, pos, "unexpected function")
+                self.addfunc(tokenstack, operstack, TOP1, value, prio + tmpprio)
                 noperators += 1
                 expected = self.LPAREN
-            elif self.is_var():
+            elif kind == "var":
                 if (expected & self.PRIMARY) == 0:
-                    self.error_parsing(self.pos, "unexpected variable")
-                vartoken = Token(TVAR, self.tokenindex, 0, 0)
+                    self.error_parsing(expr, pos, "unexpected variable")
+                vartoken = Token(TVAR, value, 0, 0)
                 tokenstack.append(vartoken)
                 expected = self.OPERATOR | self.RPAREN | self.CALL
-            elif self.is_white():
-                pass
             else:
-                if self.errormsg == "":
-                    self.error_parsing(self.pos, "unknown character")
-                else:
-                    self.error_parsing(self.pos, self.errormsg)
-        if self.tmpprio < 0 or self.tmpprio >= 10:
-            self.error_parsing(self.pos, 'unmatched "()"')
+                self.error_parsing(expr, pos, "unknown character")
+        if tmpprio < 0 or tmpprio >= 10:
+            self.error_parsing(expr, len(expr), 'unmatched "()"')
         while len(operstack) > 0:
             tmp = operstack.pop()
             tokenstack.append(tmp)
         if (noperators + 1) != len(tokenstack):
-            self.error_parsing(self.pos, "parity")
+            self.error_parsing(expr, len(expr), "parity")
 
-        return Expression(tokenstack, self.ops1, self.ops2)
+        return Expression(tokenstack, self.ops1, self.ops2, self.dtype)
 
     def evaluate(self, expr, variables):
         return self.parse(expr).evaluate(variables)
 
-    def error_parsing(self, column, msg):
-        self.success = False
-        self.errormsg = (
-            f"parse error [column {column}]: {msg}, expression: {self.expression}"
-        )
-        raise ParserError(self.errormsg)
-
-    def addfunc(self, tokenstack, operstack, type_):
-        operator = Token(
-            type_,
-            self.tokenindex,
-            self.tokenprio + self.tmpprio,
-            0,
-        )
+    @staticmethod
+    def error_parsing(expr, column, msg):
+        raise ParserError(f"parse error [column {column}]: {msg}, expression: {expr}")
+
+    @staticmethod
+    def addfunc(tokenstack, operstack, type_, index, prio):
+        operator = Token(type_, index, prio, 0)
         while len(operstack) > 0:
             if operator.prio_ <= operstack[len(operstack) - 1].prio_:
                 tokenstack.append(operstack.pop())
@@ -339,155 +896,78 @@ class Parser:
                 break
         operstack.append(operator)
 
-    def is_number(self):
-        res = False
-
-        if self.expression[self.pos] == "E":
-            return False
-
-        # number in scientific notation
-        pattern = r"([-+]?([0-9]*\.?[0-9]*)[eE][-+]?[0-9]+).*"
-        match = re.match(pattern, self.expression[self.pos :])
-        if match:
-            self.pos += len(match.group(1))
-            self.tokennumber = float(match.group(1))
-            return True
-
-        # number in decimal
-        _str = ""
-        while self.pos < len(self.expression):
-            code = self.expression[self.pos]
-            if "0" <= code <= "9" or code == ".":
-                if len(_str) == 0 and code == ".":
-                    _str = "0"
-                _str += code
-                self.pos += 1
-                try:
-                    self.tokennumber = int(_str)
-                except ValueError:
-                    self.tokennumber = float(_str)
-                res = True
-            else:
-                break
-        return res
-
-    def is_const(self):
+    def tokenize(self, expr):
+        """Split expression into tokens in a single pass
+
+        Yields tuples of (kind, value, priority, position), where position is the column after
+        the token, or the column of the character for kind "unknown". Whitespace is skipped.
+        """
+        pos = 0
+        while pos < len(expr):
+            match = _TOKEN_PATTERN.match(expr, pos)
+            kind = match.lastgroup
+            text = match.group(kind)
+            end = match.end()
+            if kind == "operator":
+                priority, index = OPERATORS[text]
+                yield kind, index, priority, end
+            elif kind == "scientific":
+                yield "number", float(text), 0, end
+            elif kind == "decimal":
+                yield "number", self.decimal_number(expr, text, end), 0, end
+            elif kind == "name":
+                length = _name_length(text)
+                if length == 0:
+                    yield "unknown", text[0], 0, pos
+                    end = pos + 1
+                else:
+                    kind, value, priority, end = self.name_token(text[:length], pos)
+                    yield kind, value, priority, end
+            elif kind == "unknown":
+                yield kind, text, 0, pos
+            elif kind != "white":
+                yield kind, text, 0, end
+            pos = end
+
+    def variable_spans(self, expr):
+        """Get list of (start, end, name) for the variable tokens in expression
+
+        Only the tokens are checked, not the grammar of the expression. Raises ParserError for
+        invalid numbers.
+        """
+        return [
+            (end - len(value), end, value)
+            for kind, value, _, end in self.tokenize(expr)
+            if kind == "var"
+        ]
+
+    @staticmethod
+    def decimal_number(expr, text, end):
+        if text[0] == ".":
+            text = "0" + text
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            return Parser.error_parsing(expr, end, "invalid number")
+
+    def name_token(self, name, pos):
+        """Classify name as constant, function or variable
+
+        Constants and functions may be followed by "." which is not part of their token, thus the
+        returned end position can be before the end of the name.
+        """
         for constant_name, constant_value in self.consts.items():
-            _len = len(constant_name)
-            _str = self.expression[self.pos : self.pos + _len]
-            if constant_name == _str:
-                if len(self.expression) <= self.pos + _len:
-                    self.tokennumber = constant_value
-                    self.pos += _len
-                    return True
-                if (
-                    not self.expression[self.pos + _len].isalnum()
-                    and self.expression[self.pos + _len] != "_"
-                ):
-                    self.tokennumber = constant_value
-                    self.pos += _len
-                    return True
-        return False
-
-    def is_operator(self):
-        ops = (
-            ("**", 8, "**"),
-            ("^", 8, "^"),
-            ("%", 6, "%"),
-            ("/", 6, "/"),
-            ("\u2219", 5, "*"),  # bullet operator
-            ("\u2022", 5, "*"),  # black small circle
-            ("*", 5, "*"),
-            ("+", 4, "+"),
-            ("-", 4, "-"),
-        )
-        for token, priority, index in ops:
-            if self.expression.startswith(token, self.pos):
-                self.tokenprio = priority
-                self.tokenindex = index
-                self.pos += len(token)
-                return True
-        return False
-
-    def is_sign(self):
-        code = self.expression[self.pos - 1]
-        return code in ("+", "-")
-
-    def is_positive_sign(self):
-        code = self.expression[self.pos - 1]
-        return code == "+"
-
-    def is_negative_sign(self):
-        code = self.expression[self.pos - 1]
-        return code == "-"
-
-    def is_left_parenth(self):
-        code = self.expression[self.pos]
-        if code == "(":
-            self.pos += 1
-            self.tmpprio += 10
-            return True
-        return False
-
-    def is_right_parenth(self):
-        code = self.expression[self.pos]
-        if code == ")":
-            self.pos += 1
-            self.tmpprio -= 10
-            return True
-        return False
-
-    def is_white(self):
-        code = self.expression[self.pos]
-        if code.isspace():
-            self.pos += 1
-            return True
-        return False
-
-    def is_op1(self):
-        _str = ""
-        for i in range(self.pos, len(self.expression)):
-            char = self.expression[i]
-            if char.upper() == char.lower():
-                if i == self.pos or (char != "_" and (char < "0" or char > "9")):
-                    break
-            _str += char
-        if len(_str) > 0 and _str in self.ops1:
-            self.tokenindex = _str
-            self.tokenprio = 9
-            self.pos += len(_str)
-            return True
-        return False
-
-    def is_op2(self):
-        _str = ""
-        for i in range(self.pos, len(self.expression)):
-            char = self.expression[i]
-            if char.upper() == char.lower():
-                if i == self.pos or (char != "_" and (char < "0" or char > "9")):
-                    break
-            _str += char
-        if len(_str) > 0 and (_str in self.ops2):
-            self.tokenindex = _str
-            self.tokenprio = 9
-            self.pos += len(_str)
-            return True
-        return False
-
-    def is_var(self):
-        _str = ""
-        for i in range(self.pos, len(self.expression)):
-            char = self.expression[i]
-            if (
-                char.lower() == char.upper()
-                and not (char in "_.")
-                and (char < "0" or char > "9")
-            ):
-                break
-            _str += char
-        if _str:
-            self.tokenindex = _str
-            self.tokenprio = 6
-            self.pos += len(_str)
-            return True
-        return False
+            if name == constant_name or name.startswith(constant_name + "."):
+                return "const", constant_value, 0, pos + len(constant_name)
+
+        # Function names start with a letter and do not contain "."
+        function_name = "" if name[0] == "_" else name.split(".", 1)[0]
+        if function_name in self.ops2:
+            return "op2", function_name, 9, pos + len(function_name)
+        if function_name in self.ops1:
+            return "op1", function_name, 9, pos + len(function_name)
+        return "var", name, 6, pos + len(name)
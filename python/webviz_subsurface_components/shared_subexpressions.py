@@ -0,0 +1,168 @@
+"""Batch evaluation of expressions, computing common subexpressions once"""
+
+from .py_expression_eval import (
+    TFUNCALL,
+    TNUMBER,
+    TOP1,
+    TOP2,
+    TVAR,
+    ParserError,
+    _call_function,
+)
+
+
+def _check_stack_program(tokens, values):
+    """Raise ParserError as Expression.evaluate() for tokens not evaluable with values"""
+    depth = 0
+    for item in tokens:
+        if item.type_ in (TNUMBER, TVAR):
+            if item.type_ == TVAR and item.index_ not in values:
+                raise ParserError(f"undefined variable: {item.index_}")
+            depth += 1
+        elif item.type_ in (TOP2, TFUNCALL):
+            depth -= 1
+        elif item.type_ != TOP1:
+            raise ParserError("invalid Expression")
+        if depth < 1:
+            raise ParserError("invalid Expression")
+    if depth > 1:
+        raise ParserError("invalid Expression (parity)")
+    if depth < 1:
+        raise ParserError("invalid Expression")
+
+
+class SharedSubexpressionEvaluator:
+    """Evaluate several expressions with shared values, computing common subexpressions once
+
+    Expressions are added with add() and evaluated together by evaluate(). The token lists of
+    the expressions are merged into one DAG, where each distinct subexpression is a node
+    identified by its operator and operand nodes. Operands of the commutative operators + and *
+    are ordered, thus a+b and b+a are the same node. saved_evaluations counts the operator
+    evaluations reused.
+
+    The consumers of each node are counted when the expressions are added. When evaluating, the
+    result of a node is released as soon as its last consumer is evaluated, unless it is the
+    result of an expression. Thus only the results of expressions and of shared subexpressions
+    still to be consumed are kept, and memory does not grow with the number of tokens in the
+    batch.
+
+    Equal subexpressions give the same array object in the results, which therefore should not be
+    modified in place.
+    """
+
+    def __init__(self, values):
+        self.values = values or {}
+        self.saved_evaluations = 0
+        self._node_ids = {}
+        # Pairs of function, None for numbers and variables, and operand ids
+        self._nodes = []
+        self._results = []
+        self._consumers = []
+        self._roots = []
+
+    def add(self, expression):
+        """Add expression to the batch, raises ParserError as Expression.evaluate()
+
+        Errors raised by the operators are given by evaluate().
+        """
+        _check_stack_program(expression.tokens, self.values)
+        nstack = []  # Node ids
+        for item in expression.tokens:
+            type_ = item.type_
+            if type_ == TNUMBER:
+                key = (TNUMBER, type(item.number_).__name__, repr(item.number_))
+                nstack.append(self._node(key, None, (), item.number_))
+            elif type_ == TVAR:
+                nstack.append(
+                    self._node((TVAR, item.index_), None, (), self.values[item.index_])
+                )
+            elif type_ == TOP1:
+                operands = (nstack.pop(),)
+                nstack.append(
+                    self._node(
+                        (TOP1, item.index_) + operands,
+                        expression.ops1[item.index_],
+                        operands,
+                    )
+                )
+            elif type_ == TOP2:
+                n_2 = nstack.pop()
+                operands = (nstack.pop(), n_2)
+                key = (TOP2, item.index_) + (
+                    tuple(sorted(operands)) if item.index_ in ("+", "*") else operands
+                )
+                nstack.append(self._node(key, expression.ops2[item.index_], operands))
+            else:
+                n_1 = nstack.pop()
+                operands = (nstack.pop(), n_1)
+                nstack.append(
+                    self._node((TFUNCALL,) + operands, _call_function, operands)
+                )
+        self._roots.append(nstack[0])
+
+    def evaluate(self):
+        """Evaluate the expressions added since the previous call
+
+        Returns list of results in the order the expressions were added. If an operator raises
+        ParserError, e.g. when calling a value which is not a function, the result of each
+        expression depending on it is the ParserError.
+        """
+        roots = set(self._roots)
+        results = self._results
+        for node_id, (func, operands) in enumerate(self._nodes):
+            if func is None:
+                continue
+            args = [results[operand] for operand in operands]
+            errors = [arg for arg in args if isinstance(arg, ParserError)]
+            if errors:
+                results[node_id] = errors[0]
+            else:
+                try:
+                    results[node_id] = func(*args)
+                except ParserError as e:
+                    results[node_id] = e
+            del args
+            for operand in operands:
+                self._consumers[operand] -= 1
+                if self._consumers[operand] == 0 and operand not in roots:
+                    results[operand] = None
+
+        evaluated = [results[root] for root in self._roots]
+        self._node_ids = {}
+        self._nodes = []
+        self._results = []
+        self._consumers = []
+        self._roots = []
+        return evaluated
+
+    def _node(self, key, func, operands, value=None):
+        node_id = self._node_ids.get(key)
+        if node_id is not None:
+            if func is not None:
+                self.saved_evaluations += 1
+            return node_id
+        node_id = len(self._nodes)
+        self._nodes.append((func, operands))
+        self._results.append(value)
+        self._consumers.append(0)
+        for operand in operands:
+            self._consumers[operand] += 1
+        self._node_ids[key] = node_id
+        return node_id
+
+
+def evaluate_many(expressions, values):
+    """Evaluate expressions with shared values, computing common subexpressions once
+
+    Returns list of results and the number of saved operator evaluations, see
+    SharedSubexpressionEvaluator. Raises ParserError as Expression.evaluate() for the first
+    expression failing.
+    """
+    evaluator = SharedSubexpressionEvaluator(values)
+    for expression in expressions:
+        evaluator.add(expression)
+    results = evaluator.evaluate()
+    for result in results:
+        if isinstance(result, ParserError):
+            raise result
+    return results, evaluator.saved_evaluations